@@ -0,0 +1,14 @@
+import os
+import sys
+
+# The Python packages of the app are vendored in the virtualenv.
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "viral-env",
+        "lib",
+        "python3.9",
+        "site-packages",
+    ),
+)
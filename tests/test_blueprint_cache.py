@@ -0,0 +1,40 @@
+import os
+import stat
+
+import pytest
+
+from googleapiclient.discovery_cache import blueprint
+
+posix_only = pytest.mark.skipif(
+    not hasattr(os, "getuid"), reason="ownership checks are POSIX only"
+)
+
+
+def test_round_trip(tmp_path):
+    cache = blueprint.BlueprintCache(str(tmp_path / "blueprints"))
+    cache.set("svc", "v1", "digest", {"rootUrl": "https://svc/"})
+    assert cache.get("svc", "v1", "digest") == {"rootUrl": "https://svc/"}
+    assert cache.get("svc", "v1", "other") is None
+
+
+@posix_only
+def test_directory_is_private(tmp_path):
+    directory = tmp_path / "blueprints"
+    blueprint.BlueprintCache(str(directory)).set("svc", "v1", "digest", {})
+    assert stat.S_IMODE(os.stat(directory).st_mode) & 0o077 == 0
+
+
+@posix_only
+def test_default_directory_is_per_user():
+    assert blueprint._default_directory().endswith("-%d" % os.getuid())
+
+
+@posix_only
+def test_writable_by_others_is_ignored(tmp_path):
+    directory = tmp_path / "blueprints"
+    blueprint.BlueprintCache(str(directory)).set("svc", "v1", "digest", {"a": 1})
+    os.chmod(directory, 0o777)
+    cache = blueprint.BlueprintCache(str(directory))
+    assert cache.get("svc", "v1", "digest") is None
+    cache.set("svc", "v1", "other", {})
+    assert not os.path.exists(cache._path("svc", "v1", "other"))
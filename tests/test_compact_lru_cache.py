@@ -0,0 +1,34 @@
+import gc
+import tracemalloc
+
+import cachetools
+
+
+def _bytes_per_item(cls, count=10000):
+    keys = list(range(count))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        cache = cls(count)
+        for key in keys:
+            cache[key] = None
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(cache) == count
+    return size / count
+
+
+def test_takes_less_memory_per_item_than_lru_cache():
+    compact = _bytes_per_item(cachetools.CompactLRUCache)
+    lru = _bytes_per_item(cachetools.LRUCache)
+    assert compact < 0.8 * lru
+
+
+def test_evicts_least_recently_used():
+    cache = cachetools.CompactLRUCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"]
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
@@ -0,0 +1,32 @@
+import inspect
+import os
+import pydoc
+
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+
+def _build_youtube():
+    path = os.path.join(discovery_cache.DISCOVERY_DOC_DIR, "youtube.v3.json")
+    with open(path) as f:
+        return build_from_document(f.read(), developerKey="key")
+
+
+def test_signature_of_generated_method():
+    method = _build_youtube().videos().list
+    signature = inspect.signature(method)
+    assert [p.kind for p in signature.parameters.values()] == [
+        inspect.Parameter.VAR_KEYWORD
+    ]
+
+
+def test_names_of_generated_method():
+    method = _build_youtube().videos().list
+    assert method.__name__ == "method"
+    assert method.__qualname__ == "createMethod.<locals>.method"
+
+
+def test_help_of_generated_method():
+    text = pydoc.render_doc(_build_youtube().videos().list, renderer=pydoc.plaintext)
+    assert "method(**kwargs)" in text
+    assert "part: string, " in text
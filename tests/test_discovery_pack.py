@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import pytest
+
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build
+from googleapiclient.discovery_cache import pack
+
+BUNDLED_DIR = discovery_cache.DISCOVERY_DOC_DIR
+DOCUMENTS = ["drive.v3.json", "youtube.v3.json"]
+
+
+@pytest.fixture
+def pack_paths(tmp_path, monkeypatch):
+    """Points discovery_cache at a copy of some bundled documents."""
+    directory = tmp_path / "documents"
+    directory.mkdir()
+    for name in DOCUMENTS:
+        shutil.copy2(os.path.join(BUNDLED_DIR, name), directory / name)
+    pack_path = str(tmp_path / "documents.pack")
+    monkeypatch.setattr(discovery_cache, "DISCOVERY_DOC_DIR", str(directory))
+    monkeypatch.setattr(discovery_cache, "DISCOVERY_DOC_PACK", pack_path)
+    monkeypatch.setattr(discovery_cache, "_static_pack", None)
+    monkeypatch.setattr(discovery_cache, "_static_pack_loaded", False)
+    yield directory, pack_path
+    if discovery_cache._static_pack is not None:
+        discovery_cache._static_pack.close()
+
+
+@pytest.mark.parametrize("argv", [[], ["--compress"]])
+def test_generated_pack_serves_the_documents(pack_paths, argv):
+    directory, pack_path = pack_paths
+    pack.main(argv)
+    assert os.path.exists(pack_path)
+
+    assert discovery_cache._get_static_pack() is not None
+    for name in DOCUMENTS:
+        serviceName, version, _ = name.split(".")
+        with open(directory / name) as f:
+            expected = f.read()
+        assert discovery_cache.get_static_doc(serviceName, version) == expected
+    service = build("drive", "v3", static_discovery=True, developerKey="key")
+    assert hasattr(service, "files")
+
+
+def test_changed_document_is_read_from_its_file(pack_paths):
+    directory, pack_path = pack_paths
+    pack.write_pack(pack_path, str(directory))
+    path = directory / DOCUMENTS[0]
+    path.write_text('{"changed": true}')
+    os.utime(path, ns=(0, 0))
+    assert discovery_cache.get_static_doc("drive", "v3") == '{"changed": true}'
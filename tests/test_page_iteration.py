@@ -0,0 +1,48 @@
+import json
+import threading
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+PAGES = [
+    {"files": [{"id": "a"}, {"id": "b"}], "nextPageToken": "t1"},
+    {"files": [{"id": "c"}]},
+]
+
+
+class _ThreadRecordingHttp(HttpMockSequence):
+    def __init__(self, iterable):
+        super().__init__(iterable)
+        self.threads = []
+
+    def request(self, *args, **kwargs):
+        self.threads.append(threading.current_thread())
+        return super().request(*args, **kwargs)
+
+
+def _service(http):
+    return build("drive", "v3", http=http, static_discovery=True)
+
+
+def _pages_http():
+    return _ThreadRecordingHttp(
+        [({"status": "200"}, json.dumps(page)) for page in PAGES]
+    )
+
+
+def test_unclonable_http_prefetches_in_one_background_thread():
+    http = _pages_http()
+    files = _service(http).files()
+    ids = [item["id"] for item in files.list_iter(files.list())]
+    assert ids == ["a", "b", "c"]
+    assert len(http.threads) == 2
+    assert threading.current_thread() not in http.threads
+    assert http.threads[0] is http.threads[1]
+
+
+def test_prefetch_zero_requests_pages_in_the_calling_thread():
+    http = _pages_http()
+    files = _service(http).files()
+    ids = [item["id"] for item in files.list_iter(files.list(), prefetch=0)]
+    assert ids == ["a", "b", "c"]
+    assert http.threads == [threading.current_thread()] * 2
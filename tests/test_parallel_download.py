@@ -0,0 +1,63 @@
+import http.server
+import re
+import socketserver
+import threading
+import time
+
+import pytest
+
+from googleapiclient.http import HttpRequest, MediaParallelDownload, build_http
+
+MEDIA = bytes(range(256)) * 64
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(0.05)
+        with server.lock:
+            server.active -= 1
+        start, end = map(
+            int, re.match(r"bytes=(\d+)-(\d+)", self.headers["range"]).groups()
+        )
+        body = MEDIA[start : end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, len(MEDIA)))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    server = _Server(("127.0.0.1", 0), _RangeHandler)
+    server.lock = threading.Lock()
+    server.active = server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_plain_http_downloads_chunks_concurrently(server):
+    uri = "http://127.0.0.1:%d/media" % server.server_address[1]
+    request = HttpRequest(build_http(), lambda resp, content: content, uri)
+    buffer = bytearray(len(MEDIA))
+    downloader = MediaParallelDownload(buffer, request, chunksize=1024, max_workers=4)
+    status = downloader.download()
+    assert status.progress() == 1.0
+    assert bytes(buffer) == MEDIA
+    assert server.peak > 1
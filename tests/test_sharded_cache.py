@@ -0,0 +1,35 @@
+import pytest
+
+import cachetools
+
+
+@pytest.mark.parametrize("maxsize", [1, 2, 4, 15])
+def test_small_maxsize_caches_every_key(maxsize):
+    cache = cachetools.ShardedCache(maxsize)
+    assert len(cache.shards) == maxsize
+    assert cache.maxsize == maxsize
+    for key in range(100):
+        cache[key] = key
+        assert cache[key] == key
+    assert len(cache) <= maxsize
+
+
+def test_small_maxsize_with_cached():
+    calls = []
+
+    @cachetools.cached(cachetools.ShardedCache(4))
+    def func(key):
+        calls.append(key)
+        return key
+
+    for key in range(4):
+        func(key)
+        func(key)
+    assert calls == list(range(4))
+
+
+def test_zero_maxsize():
+    cache = cachetools.ShardedCache(0)
+    assert len(cache.shards) == 1
+    with pytest.raises(ValueError):
+        cache[1] = 1
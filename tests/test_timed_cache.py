@@ -0,0 +1,36 @@
+import pytest
+
+import cachetools
+
+
+class Timer:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+def _ttl_cache(timer):
+    return cachetools.TTLCache(10, ttl=1, timer=timer, expire_interval=100)
+
+
+def _tlru_cache(timer):
+    return cachetools.TLRUCache(
+        10, lambda key, value, now: now + 1, timer=timer, expire_interval=100
+    )
+
+
+@pytest.mark.parametrize("make_cache", [_ttl_cache, _tlru_cache])
+def test_len_is_exact_with_expire_interval(make_cache):
+    timer = Timer()
+    cache = make_cache(timer)
+    cache["a"] = 1
+    timer.time = 2
+    cache["b"] = 2
+    # adding "b" did not remove "a", as the interval has not elapsed
+    assert cache.approx_len == 2
+    assert list(cache) == ["b"]
+    assert len(cache) == 1
+    assert cache.currsize == 1
+    assert repr(cache).endswith("({'b': 2}, maxsize=10, currsize=1)")
@@ -0,0 +1,40 @@
+import logging
+
+import httplib2
+
+from googleapiclient.http import HttpMockSequence, _TransportPool, build_http
+
+
+def test_plain_http_is_cloned_per_worker():
+    http = build_http()
+    http.add_credentials("user", "password")
+    with _TransportPool(http) as transports:
+        assert transports.max_workers(4) == 4
+        first, second = transports.get(), transports.get()
+        assert first is not http and second is not first
+        assert isinstance(first, httplib2.Http)
+        transports.put(first)
+        transports.put(second)
+    # Closing the clones leaves the credentials of the original alone.
+    assert list(http.credentials.iter("")) == [("user", "password")]
+
+
+def test_unclonable_http_is_capped_with_a_warning(caplog):
+    http = HttpMockSequence([])
+    with caplog.at_level(logging.WARNING, logger="googleapiclient.http"):
+        with _TransportPool(http) as transports:
+            assert transports.max_workers(4) == 1
+            assert transports.get() is http
+    assert "one at a time" in caplog.text
+
+
+def test_http_factory_is_used_as_given():
+    created = []
+
+    def http_factory():
+        created.append(HttpMockSequence([]))
+        return created[-1]
+
+    with _TransportPool(HttpMockSequence([]), http_factory) as transports:
+        assert transports.max_workers(4) == 4
+        assert transports.get() is created[0]
@@ -2,11 +2,14 @@
 
 __all__ = (
     "Cache",
+    "CompactLRUCache",
     "FIFOCache",
     "LFUCache",
     "LRUCache",
     "MRUCache",
     "RRCache",
+    "SWRCache",
+    "ShardedCache",
     "TLRUCache",
     "TTLCache",
     "cached",
@@ -17,13 +20,16 @@ __version__ = "5.5.2"
 
 import collections
 import collections.abc
+import concurrent.futures
+import contextlib
 import functools
 import heapq
 import random
+import threading
 import time
 
 from . import keys
-from ._decorators import _cached_wrapper
+from ._decorators import _Call, _cached_wrapper, _call_pending
 
 
 class _DefaultSize:
@@ -172,32 +178,115 @@ class FIFOCache(Cache):
 class LFUCache(Cache):
     """Least Frequently Used (LFU) cache implementation."""
 
+    class _Link:
+        __slots__ = ("count", "keys", "next", "prev")
+
+        def __init__(self, count, keys=None):
+            self.count = count
+            # keys used `count` times, least recently used first
+            self.keys = collections.OrderedDict() if keys is None else keys
+
+        def __reduce__(self):
+            return LFUCache._Link, (self.count, self.keys)
+
+        def insert_after(self, link):
+            self.prev = link
+            self.next = next = link.next
+            link.next = next.prev = self
+
+        def unlink(self):
+            next = self.next
+            prev = self.prev
+            prev.next = next
+            next.prev = prev
+
     def __init__(self, maxsize, getsizeof=None):
         Cache.__init__(self, maxsize, getsizeof)
-        self.__counter = collections.Counter()
+        # circular list of links by increasing count, rooted at a sentinel
+        self.__root = root = LFUCache._Link(0)
+        root.prev = root.next = root
+        self.__links = {}
 
     def __getitem__(self, key, cache_getitem=Cache.__getitem__):
         value = cache_getitem(self, key)
         if key in self:  # __missing__ may not store item
-            self.__counter[key] -= 1
+            self.__touch(key)
         return value
 
     def __setitem__(self, key, value, cache_setitem=Cache.__setitem__):
         cache_setitem(self, key, value)
-        self.__counter[key] -= 1
+        if key in self.__links:
+            self.__touch(key)
+            return
+        root = self.__root
+        link = root.next
+        if link.count != 1:
+            link = LFUCache._Link(1)
+            link.insert_after(root)
+        link.keys[key] = None
+        self.__links[key] = link
 
     def __delitem__(self, key, cache_delitem=Cache.__delitem__):
         cache_delitem(self, key)
-        del self.__counter[key]
+        link = self.__links.pop(key)
+        del link.keys[key]
+        if not link.keys:
+            link.unlink()
+
+    def __setstate__(self, state):
+        counter = state.get("_LFUCache__counter")
+        if counter is not None:
+            # pickled by a version keeping a Counter of negated counts
+            state = dict(state)
+            del state["_LFUCache__counter"]
+            root, links = self.__from_counter(counter)
+            state["_LFUCache__root"] = root
+            state["_LFUCache__links"] = links
+        self.__dict__.update(state)
+        root = self.__root
+        root.prev = root.next = root
+        links = {id(link): link for link in self.__links.values()}
+        for link in sorted(links.values(), key=lambda obj: obj.count):
+            link.insert_after(root.prev)
+
+    @staticmethod
+    def __from_counter(counter):
+        # counter order breaks ties, as with most_common()
+        links = {}
+        buckets = {}
+        for key, count in counter.items():
+            try:
+                link = buckets[-count]
+            except KeyError:
+                link = buckets[-count] = LFUCache._Link(-count)
+            link.keys[key] = None
+            links[key] = link
+        return LFUCache._Link(0), links
 
     def popitem(self):
         """Remove and return the `(key, value)` pair least frequently used."""
-        try:
-            ((key, _),) = self.__counter.most_common(1)
-        except ValueError:
-            raise KeyError("%s is empty" % type(self).__name__) from None
-        else:
-            return (key, self.pop(key))
+        root = self.__root
+        link = root.next
+        if link is root:
+            raise KeyError("%s is empty" % type(self).__name__)
+        key = next(iter(link.keys))
+        return (key, self.pop(key))
+
+    def __touch(self, key):
+        link = self.__links[key]
+        count = link.count + 1
+        next = link.next
+        if next.count != count:
+            if len(link.keys) == 1:
+                link.count = count
+                return
+            next = LFUCache._Link(count)
+            next.insert_after(link)
+        next.keys[key] = None
+        del link.keys[key]
+        if not link.keys:
+            link.unlink()
+        self.__links[key] = next
 
 
 class LRUCache(Cache):
@@ -237,6 +326,106 @@ class LRUCache(Cache):
             self.__order[key] = None
 
 
+class CompactLRUCache(Cache):
+    """Least Recently Used (LRU) cache implementation keeping its items in
+    a single ordered mapping.
+
+    `LRUCache` keeps a dict of items and an ordered mapping of keys,
+    while this keeps only the ordered mapping, which takes about 30%
+    less memory per item.  The recency order is kept by the C nodes of
+    `collections.OrderedDict`, so there is no Python node type to give
+    `__slots__` to; the cache object itself has a `__dict__` from
+    `Cache`, but that is a fixed cost, not a per-item one.  Item sizes
+    are only recorded if `getsizeof` is given.
+
+    """
+
+    def __init__(self, maxsize, getsizeof=None):
+        if getsizeof:
+            self.getsizeof = getsizeof
+        if self.getsizeof is not Cache.getsizeof:
+            self.__size = dict()
+        else:
+            self.__size = None
+        self.__items = collections.OrderedDict()
+        self.__currsize = 0
+        self.__maxsize = maxsize
+
+    def __repr__(self):
+        return "%s(%s, maxsize=%r, currsize=%r)" % (
+            self.__class__.__name__,
+            repr(dict(self.__items)),
+            self.__maxsize,
+            self.currsize,
+        )
+
+    def __getitem__(self, key):
+        try:
+            value = self.__items[key]
+        except KeyError:
+            return self.__missing__(key)
+        self.__items.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        maxsize = self.__maxsize
+        size = self.getsizeof(value)
+        if size > maxsize:
+            raise ValueError("value too large")
+        items = self.__items
+        sizes = self.__size
+        if sizes is None:
+            if key not in items:
+                while len(items) >= maxsize:
+                    self.popitem()
+        else:
+            if key not in items or sizes[key] < size:
+                while self.__currsize + size > maxsize:
+                    self.popitem()
+            self.__currsize += size - sizes.get(key, 0)
+            sizes[key] = size
+        items[key] = value
+        items.move_to_end(key)
+
+    def __delitem__(self, key):
+        del self.__items[key]
+        if self.__size is not None:
+            self.__currsize -= self.__size.pop(key)
+
+    def __contains__(self, key):
+        return key in self.__items
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __len__(self):
+        return len(self.__items)
+
+    @property
+    def maxsize(self):
+        """The maximum size of the cache."""
+        return self.__maxsize
+
+    @property
+    def currsize(self):
+        """The current size of the cache."""
+        if self.__size is None:
+            return len(self.__items)
+        return self.__currsize
+
+    def popitem(self):
+        """Remove and return the `(key, value)` pair least recently used."""
+        items = self.__items
+        try:
+            key = next(iter(items))
+        except StopIteration:
+            raise KeyError("%s is empty" % type(self).__name__) from None
+        else:
+            value = items[key]
+            del self[key]
+            return (key, value)
+
+
 class MRUCache(Cache):
     """Most Recently Used (MRU) cache implementation."""
 
@@ -301,7 +490,16 @@ class RRCache(Cache):
 
 
 class _TimedCache(Cache):
-    """Base class for time aware cache implementations."""
+    """Base class for time aware cache implementations.
+
+    Expired items are removed whenever an item is added or the cache's
+    size is queried.  If `expire_interval` is given, adding an item
+    removes expired items in bulk at most once per interval instead.
+    Until then they are no longer visible to lookups, and `len()` and
+    `currsize` still only count the items that have not expired, while
+    `approx_len` also counts the expired items not removed yet.
+
+    """
 
     class _Timer:
         def __init__(self, timer):
@@ -331,9 +529,13 @@ class _TimedCache(Cache):
         def __getattr__(self, name):
             return getattr(self.__timer, name)
 
-    def __init__(self, maxsize, timer=time.monotonic, getsizeof=None):
+    def __init__(
+        self, maxsize, timer=time.monotonic, getsizeof=None, expire_interval=None
+    ):
         Cache.__init__(self, maxsize, getsizeof)
         self.__timer = _TimedCache._Timer(timer)
+        self.__expire_interval = expire_interval
+        self.__next_expire = None
 
     def __repr__(self, cache_repr=Cache.__repr__):
         with self.__timer as time:
@@ -356,9 +558,42 @@ class _TimedCache(Cache):
         """The timer function used by the cache."""
         return self.__timer
 
+    @property
+    def expire_interval(self):
+        """The minimum time between removals of expired items, or `None`."""
+        return self.__expire_interval
+
+    @property
+    def approx_len(self):
+        """The number of items in the cache, including expired items not
+        removed yet, without removing them.
+
+        """
+        return Cache.__len__(self)
+
+    def __expire_due(self, time):
+        # removes expired items, at most once per expire_interval
+        interval = self.__expire_interval
+        if interval is None:
+            self.expire(time)
+        elif self.__next_expire is None or not (time < self.__next_expire):
+            self.__next_expire = time + interval
+            self.expire(time)
+        else:
+            return False
+        return True
+
+    def _expire_pending(self, time, value):
+        # called whenever an item is added; if the item does not fit,
+        # expired items are removed first so no live item is evicted
+        if self.__expire_due(time):
+            return
+        if super().currsize + self.getsizeof(value) > self.maxsize:
+            self.expire(time)
+
     def clear(self):
         with self.__timer as time:
-            self.expire(time)
+            self.__expire_due(time)
             Cache.clear(self)
 
     def get(self, *args, **kwargs):
@@ -393,8 +628,10 @@ class TTLCache(_TimedCache):
             prev.next = next
             next.prev = prev
 
-    def __init__(self, maxsize, ttl, timer=time.monotonic, getsizeof=None):
-        _TimedCache.__init__(self, maxsize, timer, getsizeof)
+    def __init__(
+        self, maxsize, ttl, timer=time.monotonic, getsizeof=None, expire_interval=None
+    ):
+        _TimedCache.__init__(self, maxsize, timer, getsizeof, expire_interval)
         self.__root = root = TTLCache._Link()
         root.prev = root.next = root
         self.__links = collections.OrderedDict()
@@ -422,7 +659,7 @@ class TTLCache(_TimedCache):
 
     def __setitem__(self, key, value, cache_setitem=Cache.__setitem__):
         with self.timer as time:
-            self.expire(time)
+            self._expire_pending(time, value)
             cache_setitem(self, key, value)
         try:
             link = self.__getlink(key)
@@ -524,8 +761,10 @@ class TLRUCache(_TimedCache):
         def __lt__(self, other):
             return self.expires < other.expires
 
-    def __init__(self, maxsize, ttu, timer=time.monotonic, getsizeof=None):
-        _TimedCache.__init__(self, maxsize, timer, getsizeof)
+    def __init__(
+        self, maxsize, ttu, timer=time.monotonic, getsizeof=None, expire_interval=None
+    ):
+        _TimedCache.__init__(self, maxsize, timer, getsizeof, expire_interval)
         self.__items = collections.OrderedDict()
         self.__order = []
         self.__ttu = ttu
@@ -555,7 +794,7 @@ class TLRUCache(_TimedCache):
             expires = self.__ttu(key, value, time)
             if not (time < expires):
                 return  # skip expired items
-            self.expire(time)
+            self._expire_pending(time, value)
             cache_setitem(self, key, value)
         # removing an existing item would break the heap structure, so
         # only mark it as removed for now
@@ -631,16 +870,316 @@ class TLRUCache(_TimedCache):
         return value
 
 
+class SWRCache(TTLCache):
+    """TTL cache serving expired items while they are refreshed.
+
+    Items are fresh for `ttl`. Past that, they are still served (and
+    counted as stale hits) until they are refreshed, or until they
+    reach `hard_ttl` and are evicted. Refreshes run on `executor`,
+    which defaults to a small thread pool created on first use.
+
+    """
+
+    def __init__(
+        self,
+        maxsize,
+        ttl,
+        hard_ttl,
+        timer=time.monotonic,
+        getsizeof=None,
+        executor=None,
+        expire_interval=None,
+    ):
+        if hard_ttl < ttl:
+            raise ValueError("hard_ttl must not be less than ttl")
+        TTLCache.__init__(self, maxsize, hard_ttl, timer, getsizeof, expire_interval)
+        self.__ttl = ttl
+        self.__stale = {}  # key -> time the item turns stale
+        self.__executor = executor
+        self.__lock = threading.Lock()
+        self.__refreshing = set()
+        self.__stale_hits = 0
+        self.__refresh_failures = 0
+
+    def __getitem__(self, key, ttl_getitem=TTLCache.__getitem__):
+        with self.timer as time:
+            value = ttl_getitem(self, key)
+            try:
+                stale = not (time < self.__stale[key])
+            except KeyError:
+                stale = False  # __missing__ may not store item
+        if stale:
+            self.__stale_hits += 1
+        return value
+
+    def __setitem__(self, key, value, ttl_setitem=TTLCache.__setitem__):
+        with self.timer as time:
+            ttl_setitem(self, key, value)
+            self.__stale[key] = time + self.__ttl
+
+    def __delitem__(self, key, ttl_delitem=TTLCache.__delitem__):
+        try:
+            ttl_delitem(self, key)
+        finally:
+            self.__stale.pop(key, None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_SWRCache__lock"]
+        state["_SWRCache__executor"] = None
+        state["_SWRCache__refreshing"] = set()
+        return state
+
+    def __setstate__(self, state):
+        state["_SWRCache__lock"] = threading.Lock()
+        TTLCache.__setstate__(self, state)
+
+    @property
+    def ttl(self):
+        """The time items are served without being refreshed."""
+        return self.__ttl
+
+    @property
+    def hard_ttl(self):
+        """The time-to-live value of the cache's items."""
+        return TTLCache.ttl.fget(self)
+
+    @property
+    def stale_hits(self):
+        """The number of lookups that returned a stale item."""
+        return self.__stale_hits
+
+    @property
+    def refresh_failures(self):
+        """The number of refreshes that raised an exception."""
+        return self.__refresh_failures
+
+    def expire(self, time=None):
+        expired = TTLCache.expire(self, time)
+        for key, _ in expired:
+            del self.__stale[key]
+        return expired
+
+    def stale(self, key):
+        """Return whether `key` is in the cache and past its `ttl`."""
+        with self.timer as time:
+            try:
+                stale_at = self.__stale[key]
+            except KeyError:
+                return False
+            return key in self and not (time < stale_at)
+
+    def refresh(self, key, func, lock=None):
+        """Store the result of `func()` as the value of `key`, in the
+        background.
+
+        Nothing is done if `key` is already being refreshed. `lock`, if
+        given, is held while the result is stored. Return the future of
+        the refresh, or `None`.
+
+        """
+        with self.__lock:
+            if key in self.__refreshing:
+                return None
+            self.__refreshing.add(key)
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=4, thread_name_prefix="cachetools-refresh"
+                )
+            executor = self.__executor
+        try:
+            return executor.submit(self.__refresh, key, func, lock)
+        except BaseException:
+            with self.__lock:
+                self.__refreshing.discard(key)
+            raise
+
+    def __refresh(self, key, func, lock):
+        try:
+            try:
+                value = func()
+            except BaseException:
+                with self.__lock:
+                    self.__refresh_failures += 1
+                raise
+            with lock if lock is not None else contextlib.nullcontext():
+                try:
+                    self[key] = value
+                except ValueError:
+                    pass  # value too large
+        finally:
+            with self.__lock:
+                self.__refreshing.discard(key)
+
+
+class ShardedCache(Cache):
+    """Thread-safe cache spreading its items over independently locked
+    shards.
+
+    Keys are distributed by hash over `shards` caches, each created by
+    calling `factory` with an equal part of `maxsize`, for example
+    `functools.partial(TTLCache, ttl=600)`. Each shard evicts its own
+    items according to its policy. If `maxsize` is less than `shards`,
+    only `maxsize` shards are used, so that no shard is empty.
+
+    """
+
+    def __init__(self, maxsize, shards=16, factory=LRUCache):
+        if shards < 1:
+            raise ValueError("shards must be positive")
+        shards = max(1, min(shards, maxsize))
+        size, extra = divmod(maxsize, shards)
+        self.__shards = tuple(factory(size + (i < extra)) for i in range(shards))
+        self.__locks = tuple(threading.Lock() for _ in range(shards))
+
+    def __repr__(self):
+        return "%s(%s, maxsize=%r, currsize=%r)" % (
+            self.__class__.__name__,
+            repr(dict(self.items())),
+            self.maxsize,
+            self.currsize,
+        )
+
+    def __getitem__(self, key):
+        _, shard, lock = self._locate(key)
+        with lock:
+            try:
+                return shard[key]
+            except KeyError:
+                pass  # key not found
+        return self.__missing__(key)
+
+    def __setitem__(self, key, value):
+        _, shard, lock = self._locate(key)
+        with lock:
+            shard[key] = value
+
+    def __delitem__(self, key):
+        _, shard, lock = self._locate(key)
+        with lock:
+            del shard[key]
+
+    def __contains__(self, key):
+        _, shard, lock = self._locate(key)
+        with lock:
+            return key in shard
+
+    def __iter__(self):
+        for shard, lock in zip(self.__shards, self.__locks):
+            with lock:
+                keys = list(shard)
+            yield from keys
+
+    def __len__(self):
+        return sum(self.__map(len))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_ShardedCache__locks"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__locks = tuple(threading.Lock() for _ in self.__shards)
+
+    @property
+    def maxsize(self):
+        """The maximum size of the cache."""
+        return sum(shard.maxsize for shard in self.__shards)
+
+    @property
+    def currsize(self):
+        """The current size of the cache."""
+        return sum(self.__map(lambda shard: shard.currsize))
+
+    @property
+    def shards(self):
+        """The caches holding the items."""
+        return self.__shards
+
+    @property
+    def locks(self):
+        """The locks guarding the shards, in the same order."""
+        return self.__locks
+
+    def getsizeof(self, value):
+        """Return the size of a cache element's value."""
+        return self.__shards[0].getsizeof(value)
+
+    def get(self, key, default=None):
+        _, shard, lock = self._locate(key)
+        with lock:
+            return shard.get(key, default)
+
+    def pop(self, key, *args):
+        _, shard, lock = self._locate(key)
+        with lock:
+            return shard.pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        _, shard, lock = self._locate(key)
+        with lock:
+            return shard.setdefault(key, default)
+
+    def popitem(self):
+        """Remove and return a `(key, value)` pair, as chosen by the
+        policy of the first shard that is not empty.
+
+        """
+        for shard, lock in zip(self.__shards, self.__locks):
+            with lock:
+                try:
+                    return shard.popitem()
+                except KeyError:
+                    pass  # shard is empty
+        raise KeyError("%s is empty" % type(self).__name__)
+
+    def clear(self):
+        self.__map(lambda shard: shard.clear())
+
+    def _locate(self, key):
+        # return the index, cache and lock of the shard holding `key`
+        index = hash(key) % len(self.__shards)
+        return index, self.__shards[index], self.__locks[index]
+
+    def __map(self, func):
+        results = []
+        for shard, lock in zip(self.__shards, self.__locks):
+            with lock:
+                results.append(func(shard))
+        return results
+
+
 _CacheInfo = collections.namedtuple(
     "CacheInfo", ["hits", "misses", "maxsize", "currsize"]
 )
 
+_CoalescedCacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize", "coalesced"]
+)
+
 
-def cached(cache, key=keys.hashkey, lock=None, info=False):
+def cached(cache, key=keys.hashkey, lock=None, info=False, coalesce=False):
     """Decorator to wrap a function with a memoizing callable that saves
     results in a cache.
 
+    If `coalesce` is true, concurrent calls missing the same key wait
+    for a single call of the wrapped function and share its result or
+    exception, and `cache_info()` counts them as `coalesced`. A lock
+    is created if none is given.
+
+    With a `SWRCache`, calls returning a stale item also have the cache
+    refresh it with a background call of the wrapped function. A lock
+    is created if none is given.
+
+    A `ShardedCache` needs no lock: each call only takes the lock of
+    the shard holding its key.
+
     """
+    refresh = isinstance(cache, SWRCache)
+    sharded = isinstance(cache, ShardedCache)
+    if (coalesce or refresh) and lock is None:
+        lock = threading.Lock()
 
     def decorator(func):
         if info:
@@ -659,9 +1198,21 @@ def cached(cache, key=keys.hashkey, lock=None, info=False):
                 def make_info(hits, misses):
                     return _CacheInfo(hits, misses, 0, 0)
 
-            wrapper = _cached_wrapper(func, cache, key, lock, make_info)
+            if coalesce and cache is not None:
+                make_cache_info = make_info
+
+                def make_info(hits, misses, coalesced):
+                    return _CoalescedCacheInfo(
+                        *make_cache_info(hits, misses), coalesced
+                    )
+
+            wrapper = _cached_wrapper(
+                func, cache, key, lock, make_info, coalesce, refresh, sharded
+            )
         else:
-            wrapper = _cached_wrapper(func, cache, key, lock, None)
+            wrapper = _cached_wrapper(
+                func, cache, key, lock, None, coalesce, refresh, sharded
+            )
 
         wrapper.cache = cache
         wrapper.cache_key = key
@@ -672,14 +1223,68 @@ def cached(cache, key=keys.hashkey, lock=None, info=False):
     return decorator
 
 
-def cachedmethod(cache, key=keys.methodkey, lock=None):
+def cachedmethod(cache, key=keys.methodkey, lock=None, coalesce=False):
     """Decorator to wrap a class or instance method with a memoizing
     callable that saves results in a cache.
 
+    If `coalesce` is true, concurrent calls missing the same key of the
+    same cache wait for a single call of the method and share its
+    result or exception.
+
     """
 
     def decorator(method):
-        if lock is None:
+        if coalesce:
+            pending = {}
+            pending_lock = threading.RLock()
+            # without a lock, the cache is guarded by the pending lock
+            cache_lock = pending_lock if lock is None else None
+
+            def wrapper(self, *args, **kwargs):
+                c = cache(self)
+                if c is None:
+                    return method(self, *args, **kwargs)
+                k = key(self, *args, **kwargs)
+                # the cache lock, if any, is always taken first
+                with cache_lock or lock(self):
+                    try:
+                        return c[k]
+                    except KeyError:
+                        pass  # key not found
+                    with pending_lock:
+                        call = pending.get((id(c), k))
+                        if call is None:
+                            call = pending[(id(c), k)] = _Call()
+                            owner = True
+                        else:
+                            owner = False
+                if not owner:
+                    if call.owner == threading.get_ident():
+                        return method(self, *args, **kwargs)  # recursive call
+                    return call.result()
+
+                def store(k, v):
+                    with cache_lock or lock(self):
+                        try:
+                            return c.setdefault(k, v)
+                        except ValueError:
+                            return v  # value too large
+
+                def done(k):
+                    with pending_lock:
+                        del pending[(id(c), k)]
+
+                return _call_pending(
+                    functools.partial(method, self), args, kwargs, k, call, store, done
+                )
+
+            def clear(self):
+                c = cache(self)
+                if c is not None:
+                    with cache_lock or lock(self):
+                        c.clear()
+
+        elif lock is None:
 
             def wrapper(self, *args, **kwargs):
                 c = cache(self)
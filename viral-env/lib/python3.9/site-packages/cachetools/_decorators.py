@@ -1,5 +1,49 @@
 """Extensible memoizing decorator helpers."""
 
+import functools
+import threading
+
+
+class _Call:
+    """A pending call of the wrapped function, shared by coalesced callers."""
+
+    __slots__ = ("event", "owner", "value", "exception")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.owner = threading.get_ident()
+        self.exception = None
+
+    def result(self):
+        self.event.wait()
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+
+def _call_pending(func, args, kwargs, k, call, store, done):
+    """Compute the pending call `call` for key `k`, handing its outcome to
+    the callers waiting on it.
+
+    `store(k, v)` saves the result and returns the value to hand out,
+    `done(k)` forgets the pending call.
+
+    """
+    try:
+        v = func(*args, **kwargs)
+    except BaseException as e:
+        done(k)
+        call.exception = e
+        call.event.set()
+        raise
+    try:
+        v = store(k, v)
+    finally:
+        done(k)
+        call.value = v
+        call.event.set()
+    return v
+
 
 def _cached_locked_info(func, cache, key, lock, info):
     hits = misses = 0
@@ -66,6 +110,167 @@ def _cached_unlocked_info(func, cache, key, info):
     return wrapper
 
 
+def _cached_coalesced_info(func, cache, key, lock, info):
+    hits = misses = coalesced = 0
+    pending = {}
+
+    def wrapper(*args, **kwargs):
+        nonlocal hits, misses, coalesced
+        k = key(*args, **kwargs)
+        with lock:
+            try:
+                result = cache[k]
+                hits += 1
+                return result
+            except KeyError:
+                pass  # key not found
+            call = pending.get(k)
+            if call is None:
+                call = pending[k] = _Call()
+                misses += 1
+                owner = True
+            else:
+                coalesced += 1
+                owner = False
+        if not owner:
+            if call.owner == threading.get_ident():
+                return func(*args, **kwargs)  # recursive call
+            return call.result()
+        return _call_pending(func, args, kwargs, k, call, store, done)
+
+    def store(k, v):
+        with lock:
+            try:
+                return cache.setdefault(k, v)
+            except ValueError:
+                return v  # value too large
+
+    def done(k):
+        with lock:
+            del pending[k]
+
+    def cache_clear():
+        nonlocal hits, misses, coalesced
+        with lock:
+            cache.clear()
+            hits = misses = coalesced = 0
+
+    def cache_info():
+        with lock:
+            return info(hits, misses, coalesced)
+
+    wrapper.cache_clear = cache_clear
+    wrapper.cache_info = cache_info
+    return wrapper
+
+
+def _cached_refreshed(func, cache, key, lock, info, coalesce):
+    hits = misses = coalesced = 0
+    pending = {}
+
+    def wrapper(*args, **kwargs):
+        nonlocal hits, misses, coalesced
+        k = key(*args, **kwargs)
+        with lock:
+            try:
+                result = cache[k]
+            except KeyError:
+                pass  # key not found
+            else:
+                hits += 1
+                if cache.stale(k):
+                    cache.refresh(k, functools.partial(func, *args, **kwargs), lock)
+                return result
+            call = pending.get(k) if coalesce else None
+            if call is None:
+                misses += 1
+                if coalesce:
+                    call = pending[k] = _Call()
+                owner = True
+            else:
+                coalesced += 1
+                owner = False
+        if not owner:
+            if call.owner == threading.get_ident():
+                return func(*args, **kwargs)  # recursive call
+            return call.result()
+        if call is not None:
+            return _call_pending(func, args, kwargs, k, call, store, done)
+        return store(k, func(*args, **kwargs))
+
+    def store(k, v):
+        with lock:
+            try:
+                # in case of a race, prefer the item already in the cache
+                return cache.setdefault(k, v)
+            except ValueError:
+                return v  # value too large
+
+    def done(k):
+        with lock:
+            del pending[k]
+
+    def cache_clear():
+        nonlocal hits, misses, coalesced
+        with lock:
+            cache.clear()
+            hits = misses = coalesced = 0
+
+    def cache_info():
+        with lock:
+            if coalesce:
+                return info(hits, misses, coalesced)
+            return info(hits, misses)
+
+    wrapper.cache_clear = cache_clear
+    if info is not None:
+        wrapper.cache_info = cache_info
+    return wrapper
+
+
+def _cached_sharded(func, cache, key, info):
+    # hits and misses per shard, counted under the lock of the shard
+    stats = [[0, 0] for _ in cache.shards]
+
+    def wrapper(*args, **kwargs):
+        k = key(*args, **kwargs)
+        index, shard, lock = cache._locate(k)
+        counts = stats[index]
+        with lock:
+            try:
+                result = shard[k]
+                counts[0] += 1
+                return result
+            except KeyError:
+                counts[1] += 1
+        v = func(*args, **kwargs)
+        with lock:
+            try:
+                # in case of a race, prefer the item already in the cache
+                return shard.setdefault(k, v)
+            except ValueError:
+                return v  # value too large
+
+    def cache_clear():
+        for index, lock in enumerate(cache.locks):
+            with lock:
+                cache.shards[index].clear()
+                stats[index] = [0, 0]
+
+    def cache_info():
+        hits = misses = 0
+        for counts, lock in zip(stats, cache.locks):
+            with lock:
+                hits += counts[0]
+                misses += counts[1]
+        return info(hits, misses)
+
+    wrapper.cache_clear = cache_clear
+    if info is not None:
+        wrapper.cache_info = cache_info
+    return wrapper
+
+
 def _uncached_info(func, info):
     misses = 0
 
@@ -107,6 +312,47 @@ def _cached_locked(func, cache, key, lock):
     return wrapper
 
 
+def _cached_coalesced(func, cache, key, lock):
+    pending = {}
+
+    def wrapper(*args, **kwargs):
+        k = key(*args, **kwargs)
+        with lock:
+            try:
+                return cache[k]
+            except KeyError:
+                pass  # key not found
+            call = pending.get(k)
+            if call is None:
+                call = pending[k] = _Call()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            if call.owner == threading.get_ident():
+                return func(*args, **kwargs)  # recursive call
+            return call.result()
+        return _call_pending(func, args, kwargs, k, call, store, done)
+
+    def store(k, v):
+        with lock:
+            try:
+                return cache.setdefault(k, v)
+            except ValueError:
+                return v  # value too large
+
+    def done(k):
+        with lock:
+            del pending[k]
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
 def _cached_unlocked(func, cache, key):
     def wrapper(*args, **kwargs):
         k = key(*args, **kwargs)
@@ -133,10 +379,18 @@ def _uncached(func):
     return wrapper
 
 
-def _cached_wrapper(func, cache, key, lock, info):
-    if info is not None:
+def _cached_wrapper(
+    func, cache, key, lock, info, coalesce=False, refresh=False, sharded=False
+):
+    if refresh and cache is not None:
+        wrapper = _cached_refreshed(func, cache, key, lock, info, coalesce)
+    elif sharded and lock is None and not coalesce:
+        wrapper = _cached_sharded(func, cache, key, info)
+    elif info is not None:
         if cache is None:
             wrapper = _uncached_info(func, info)
+        elif coalesce:
+            wrapper = _cached_coalesced_info(func, cache, key, lock, info)
         elif lock is None:
             wrapper = _cached_unlocked_info(func, cache, key, info)
         else:
@@ -144,9 +398,12 @@ def _cached_wrapper(func, cache, key, lock, info):
     else:
         if cache is None:
             wrapper = _uncached(func)
+        elif coalesce:
+            wrapper = _cached_coalesced(func, cache, key, lock)
         elif lock is None:
             wrapper = _cached_unlocked(func, cache, key)
         else:
             wrapper = _cached_locked(func, cache, key, lock)
+    if info is None:
         wrapper.cache_info = None
     return wrapper
@@ -0,0 +1,319 @@
+"""Persistent cache shared between processes, stored in a SQLite database."""
+
+__all__ = ("SQLiteCache",)
+
+import contextlib
+import io
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from . import Cache
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_used ON items (used);
+CREATE INDEX IF NOT EXISTS items_expires ON items (expires);
+CREATE TABLE IF NOT EXISTS meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    currsize INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS items_insert AFTER INSERT ON items BEGIN
+    UPDATE meta SET currsize = currsize + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS items_delete AFTER DELETE ON items BEGIN
+    UPDATE meta SET currsize = currsize - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS items_update AFTER UPDATE OF size ON items BEGIN
+    UPDATE meta SET currsize = currsize - old.size + new.size;
+END;
+"""
+
+
+def _dumps_key(key):
+    # without memoization, equal keys always pickle to the same bytes
+    f = io.BytesIO()
+    pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+    pickler.fast = True
+    pickler.dump(key)
+    return f.getvalue()
+
+
+class SQLiteCache(Cache):
+    """Least Recently Used (LRU) cache stored in a SQLite database, with
+    optional per-item time-to-live (TTL) value.
+
+    Any number of threads and processes may use the same database file
+    at once, so memoized results are shared by a process pool. Keys and
+    values must be picklable, and `timer` must return the same time in
+    all processes.
+
+    Since recording an access is a write, the time an item was last
+    used is only updated once it is more than `touch_interval` old.
+
+    """
+
+    __marker = object()
+
+    def __init__(
+        self,
+        path,
+        maxsize,
+        getsizeof=None,
+        ttl=None,
+        timer=time.time,
+        timeout=30.0,
+        touch_interval=1.0,
+    ):
+        if getsizeof:
+            self.getsizeof = getsizeof
+        self.__path = path
+        self.__maxsize = maxsize
+        self.__ttl = ttl
+        self.__timer = timer
+        self.__timeout = timeout
+        self.__touch_interval = touch_interval
+        self.__local = threading.local()
+        self.__connect().executescript(_SCHEMA)
+
+    def __repr__(self):
+        return "%s(%r, maxsize=%r, currsize=%r)" % (
+            self.__class__.__name__,
+            self.__path,
+            self.__maxsize,
+            self.currsize,
+        )
+
+    def __getitem__(self, key):
+        value = self.__get(key)
+        if value is self.__marker:
+            return self.__missing__(key)
+        return value
+
+    def __setitem__(self, key, value):
+        size = self.getsizeof(value)
+        if size > self.__maxsize:
+            raise ValueError("value too large")
+        k = _dumps_key(key)
+        with self.__transaction() as conn:
+            self.__store(conn, k, value, size, self.__timer())
+
+    def __delitem__(self, key):
+        cursor = self.__connect().execute(
+            "DELETE FROM items WHERE key = ? AND expires > ?",
+            (_dumps_key(key), self.__timer()),
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        row = (
+            self.__connect()
+            .execute(
+                "SELECT 1 FROM items WHERE key = ? AND expires > ?",
+                (_dumps_key(key), self.__timer()),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def __iter__(self):
+        rows = (
+            self.__connect()
+            .execute("SELECT key FROM items WHERE expires > ?", (self.__timer(),))
+            .fetchall()
+        )
+        for (k,) in rows:
+            yield pickle.loads(k)
+
+    def __len__(self):
+        (count,) = (
+            self.__connect()
+            .execute("SELECT COUNT(*) FROM items WHERE expires > ?", (self.__timer(),))
+            .fetchone()
+        )
+        return count
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_SQLiteCache__local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__local = threading.local()
+
+    @property
+    def path(self):
+        """The path of the database file."""
+        return self.__path
+
+    @property
+    def maxsize(self):
+        """The maximum size of the cache."""
+        return self.__maxsize
+
+    @property
+    def currsize(self):
+        """The current size of the cache."""
+        with self.__transaction() as conn:
+            conn.execute("DELETE FROM items WHERE expires <= ?", (self.__timer(),))
+            (currsize,) = conn.execute("SELECT currsize FROM meta").fetchone()
+        return currsize
+
+    @property
+    def ttl(self):
+        """The time-to-live value of the cache's items, or `None`."""
+        return self.__ttl
+
+    @property
+    def timer(self):
+        """The timer function used by the cache."""
+        return self.__timer
+
+    def get(self, key, default=None):
+        value = self.__get(key)
+        return default if value is self.__marker else value
+
+    def pop(self, key, *args):
+        k = _dumps_key(key)
+        with self.__transaction() as conn:
+            row = conn.execute(
+                "SELECT value FROM items WHERE key = ? AND expires > ?",
+                (k, self.__timer()),
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM items WHERE key = ?", (k,))
+        if row is not None:
+            return pickle.loads(row[0])
+        elif args:
+            return args[0]
+        else:
+            raise KeyError(key)
+
+    def setdefault(self, key, default=None):
+        k = _dumps_key(key)
+        size = self.getsizeof(default)
+        now = self.__timer()
+        with self.__transaction() as conn:
+            row = conn.execute(
+                "SELECT value, used FROM items WHERE key = ? AND expires > ?", (k, now)
+            ).fetchone()
+            if row is not None:
+                if not (now - row[1] < self.__touch_interval):
+                    conn.execute("UPDATE items SET used = ? WHERE key = ?", (now, k))
+            elif size <= self.__maxsize:
+                self.__store(conn, k, default, size, now)
+            else:
+                raise ValueError("value too large")
+        return default if row is None else pickle.loads(row[0])
+
+    def clear(self):
+        self.__connect().execute("DELETE FROM items")
+
+    def expire(self, time=None):
+        """Remove expired items from the cache and return an iterable of the
+        expired `(key, value)` pairs.
+
+        """
+        if time is None:
+            time = self.__timer()
+        with self.__transaction() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM items WHERE expires <= ?", (time,)
+            ).fetchall()
+            conn.execute("DELETE FROM items WHERE expires <= ?", (time,))
+        return [(pickle.loads(k), pickle.loads(v)) for k, v in rows]
+
+    def popitem(self):
+        """Remove and return the `(key, value)` pair least recently used that
+        has not already expired.
+
+        """
+        with self.__transaction() as conn:
+            row = conn.execute(
+                "SELECT key, value FROM items WHERE expires > ? ORDER BY used LIMIT 1",
+                (self.__timer(),),
+            ).fetchone()
+            if row is None:
+                raise KeyError("%s is empty" % type(self).__name__)
+            conn.execute("DELETE FROM items WHERE key = ?", (row[0],))
+        return (pickle.loads(row[0]), pickle.loads(row[1]))
+
+    def __get(self, key):
+        k = _dumps_key(key)
+        now = self.__timer()
+        conn = self.__connect()
+        row = conn.execute(
+            "SELECT value, used FROM items WHERE key = ? AND expires > ?", (k, now)
+        ).fetchone()
+        if row is None:
+            return self.__marker
+        if not (now - row[1] < self.__touch_interval):
+            conn.execute("UPDATE items SET used = ? WHERE key = ?", (now, k))
+        return pickle.loads(row[0])
+
+    def __store(self, conn, k, value, size, now):
+        v = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = math.inf if self.__ttl is None else now + self.__ttl
+        conn.execute("DELETE FROM items WHERE expires <= ?", (now,))
+        row = conn.execute("SELECT size FROM items WHERE key = ?", (k,)).fetchone()
+        oldsize = 0 if row is None else row[0]
+        (currsize,) = conn.execute("SELECT currsize FROM meta").fetchone()
+        excess = currsize - oldsize + size - self.__maxsize
+        while excess > 0:
+            ek, esize = conn.execute(
+                "SELECT key, size FROM items WHERE key != ? ORDER BY used LIMIT 1",
+                (k,),
+            ).fetchone()
+            conn.execute("DELETE FROM items WHERE key = ?", (ek,))
+            excess -= esize
+        if row is None:
+            conn.execute(
+                "INSERT INTO items VALUES (?, ?, ?, ?, ?)", (k, v, size, expires, now)
+            )
+        else:
+            conn.execute(
+                "UPDATE items SET value = ?, size = ?, expires = ?, used = ?"
+                " WHERE key = ?",
+                (v, size, expires, now, k),
+            )
+
+    def __connect(self):
+        # one connection per thread, not inherited by forked processes
+        local = self.__local
+        pid = os.getpid()
+        if getattr(local, "pid", None) != pid:
+            conn = sqlite3.connect(
+                self.__path,
+                timeout=self.__timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn = conn
+            local.pid = pid
+        return local.conn
+
+    @contextlib.contextmanager
+    def __transaction(self):
+        conn = self.__connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
@@ -12,10 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
 import copy
+import datetime
+import heapq
+import itertools
 import logging
+import random
 import threading
+import time
 
+from google.auth import _helpers
 import google.auth.exceptions as e
 
 _LOGGER = logging.getLogger(__name__)
@@ -107,3 +114,258 @@ class RefreshThread(threading.Thread):
         except Exception as err:  # pragma: NO COVER
             _LOGGER.error(f"Background refresh failed due to: {err}")
             self._error_info = err
+
+
+class _ScheduledCredentials(object):
+    """Scheduling state of a credential registered with a RefreshScheduler."""
+
+    def __init__(self, cred):
+        self.cred = cred
+        self.due = None  # monotonic time of the next refresh
+        self.future = None  # refresh in flight
+        self.failures = 0  # consecutive failed refreshes
+        self.removed = False
+
+
+class RefreshScheduler(object):
+    """Refreshes a fleet of credentials ahead of their expiry.
+
+    Registered credentials are refreshed ``lead_time`` before their token
+    expires, minus a random jitter of up to ``jitter`` so that credentials
+    issued together are not refreshed together. Refreshes run on a small
+    pool of worker threads driven by a single scheduling thread. Requests
+    made with registered credentials use the current token as long as it
+    has not expired, and only wait for a refresh when it has.
+
+    Failed refreshes are retried with exponential backoff, starting at
+    ``retry_delay`` and capped at ``max_retry_delay``.
+    """
+
+    def __init__(
+        self,
+        request,
+        max_workers=4,
+        lead_time=2 * _helpers.REFRESH_THRESHOLD,
+        jitter=datetime.timedelta(minutes=1),
+        retry_delay=1.0,
+        max_retry_delay=60.0,
+    ):
+        """Initializes the scheduler.
+
+        Args:
+            request (google.auth.transport.Request): The object used to
+                refresh credentials. Each worker thread uses its own copy.
+            max_workers (int): The maximum number of concurrent refreshes.
+            lead_time (datetime.timedelta): How long before expiry tokens are
+                refreshed.
+            jitter (datetime.timedelta): The maximum random amount by which
+                refreshes are moved earlier.
+            retry_delay (float): The delay in seconds before retrying a
+                failed refresh, doubled on each consecutive failure.
+            max_retry_delay (float): The maximum delay in seconds before
+                retrying a failed refresh.
+        """
+        if request is None:
+            raise e.InvalidValue("Unable to start scheduler. request must be valid.")
+        self._request = request
+        self._local = threading.local()
+        self._lead_time = lead_time.total_seconds()
+        self._jitter = jitter.total_seconds()
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="google-auth-refresh"
+        )
+        self._cond = threading.Condition()  # protects all the fields below
+        self._entries = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._thread = None
+        self._closed = False
+        self._refreshes = 0
+        self._failures = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._lead_total = 0.0
+        self._lead_count = 0
+        self._lead_min = None
+
+    def add(self, cred):
+        """Registers credentials with the scheduler.
+
+        The credentials are refreshed right away if they are not valid.
+
+        Args:
+            cred (google.auth.credentials.Credentials): The credentials.
+        """
+        with self._cond:
+            if self._closed:
+                raise e.InvalidOperation("The refresh scheduler is closed.")
+            if id(cred) in self._entries:
+                return
+            entry = self._entries[id(cred)] = _ScheduledCredentials(cred)
+            cred._refresh_scheduler = self
+            self._schedule(entry, self._refresh_delay(cred))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="google-auth-refresh-scheduler"
+                )
+                self._thread.daemon = True
+                self._thread.start()
+
+    def remove(self, cred):
+        """Unregisters credentials from the scheduler.
+
+        Args:
+            cred (google.auth.credentials.Credentials): The credentials.
+        """
+        with self._cond:
+            entry = self._entries.pop(id(cred), None)
+            if entry is not None:
+                entry.removed = True
+                if cred._refresh_scheduler is self:
+                    cred._refresh_scheduler = None
+
+    def refresh(self, cred):
+        """Refreshes registered credentials now, and waits for the refresh.
+
+        If a refresh of the credentials is already in flight, waits for it
+        instead of starting another one.
+
+        Args:
+            cred (google.auth.credentials.Credentials): The credentials.
+
+        Raises:
+            google.auth.exceptions.RefreshError: If the credentials could
+                not be refreshed.
+        """
+        with self._cond:
+            entry = self._entries.get(id(cred))
+            if entry is None or self._closed:
+                future = None
+            else:
+                future = self._submit(entry)
+        if future is None:
+            cred.refresh(self._thread_request())
+        else:
+            future.result()
+
+    def close(self):
+        """Stops refreshing credentials and shuts the worker threads down."""
+        with self._cond:
+            self._closed = True
+            for entry in self._entries.values():
+                entry.removed = True
+                if entry.cred._refresh_scheduler is self:
+                    entry.cred._refresh_scheduler = None
+            self._entries.clear()
+            self._heap = []
+            self._cond.notify_all()
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        """Returns metrics about the refreshes done so far.
+
+        Returns:
+            Mapping[str, Any]: The number of ``credentials`` registered, of
+            ``refreshes`` and of ``failures``; the mean and maximum refresh
+            latency in seconds (``latency_mean``, ``latency_max``); and the
+            mean and minimum time in seconds left before the replaced token
+            expired (``lead_time_mean``, ``lead_time_min``). The means and
+            minimum are None until there is something to measure.
+        """
+        with self._cond:
+            return {
+                "credentials": len(self._entries),
+                "refreshes": self._refreshes,
+                "failures": self._failures,
+                "latency_mean": self._latency_total / self._refreshes
+                if self._refreshes
+                else None,
+                "latency_max": self._latency_max,
+                "lead_time_mean": self._lead_total / self._lead_count
+                if self._lead_count
+                else None,
+                "lead_time_min": self._lead_min,
+            }
+
+    def _refresh_delay(self, cred):
+        # seconds until the credentials should be refreshed, or None
+        if cred.token is None:
+            return 0.0
+        if cred.expiry is None:
+            return None
+        remaining = (cred.expiry - _helpers.utcnow()).total_seconds()
+        return max(0.0, remaining - self._lead_time - random.uniform(0, self._jitter))
+
+    def _schedule(self, entry, delay):
+        # must be called with the lock held
+        if delay is None:
+            entry.due = None
+            return
+        entry.due = time.monotonic() + delay
+        heapq.heappush(self._heap, (entry.due, next(self._counter), entry))
+        self._cond.notify()
+
+    def _submit(self, entry):
+        # must be called with the lock held
+        if entry.future is None:
+            entry.due = None
+            entry.future = self._executor.submit(self._refresh_entry, entry)
+        return entry.future
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, entry = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                if not entry.removed and entry.due == due:
+                    self._submit(entry)
+
+    def _thread_request(self):
+        request = getattr(self._local, "request", None)
+        if request is None:
+            request = self._local.request = copy.deepcopy(self._request)
+        return request
+
+    def _refresh_entry(self, entry):
+        cred = entry.cred
+        old_expiry = cred.expiry
+        start = time.monotonic()
+        try:
+            cred.refresh(self._thread_request())
+        except Exception as err:
+            _LOGGER.warning("Scheduled refresh failed due to: %s", err)
+            with self._cond:
+                self._failures += 1
+                entry.failures += 1
+                entry.future = None
+                if not entry.removed:
+                    delay = min(
+                        self._retry_delay * 2 ** (entry.failures - 1),
+                        self._max_retry_delay,
+                    )
+                    self._schedule(entry, delay * random.uniform(0.5, 1.0))
+            raise
+        latency = time.monotonic() - start
+        with self._cond:
+            self._refreshes += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            if old_expiry is not None:
+                lead = (old_expiry - _helpers.utcnow()).total_seconds()
+                self._lead_total += lead
+                self._lead_count += 1
+                if self._lead_min is None or lead < self._lead_min:
+                    self._lead_min = lead
+            entry.failures = 0
+            entry.future = None
+            if not entry.removed:
+                self._schedule(entry, self._refresh_delay(cred))
@@ -65,6 +65,7 @@ class Credentials(_BaseCredentials):
 
         self._use_non_blocking_refresh = False
         self._refresh_worker = RefreshThreadManager()
+        self._refresh_scheduler = None
 
     @property
     def expired(self):
@@ -201,6 +202,12 @@ class Credentials(_BaseCredentials):
         if not self.valid:
             self.refresh(request)
 
+    def _scheduled_refresh(self, request):
+        # The scheduler refreshes the token ahead of expiry, only wait for it
+        # if the token can no longer be used.
+        if self.token_state == TokenState.INVALID:
+            self._refresh_scheduler.refresh(self)
+
     def _non_blocking_refresh(self, request):
         use_blocking_refresh_fallback = False
 
@@ -233,7 +240,9 @@ class Credentials(_BaseCredentials):
         # pylint: disable=unused-argument
         # (Subclasses may use these arguments to ascertain information about
         # the http request.)
-        if self._use_non_blocking_refresh:
+        if getattr(self, "_refresh_scheduler", None) is not None:
+            self._scheduled_refresh(request)
+        elif self._use_non_blocking_refresh:
             self._non_blocking_refresh(request)
         else:
             self._blocking_refresh(request)
@@ -244,6 +253,18 @@ class Credentials(_BaseCredentials):
     def with_non_blocking_refresh(self):
         self._use_non_blocking_refresh = True
 
+    def with_refresh_scheduler(self, scheduler):
+        """Has a scheduler refresh these credentials ahead of expiry.
+
+        Requests made with these credentials then no longer refresh them,
+        unless the token has expired.
+
+        Args:
+            scheduler (google.auth._refresh_worker.RefreshScheduler): The
+                scheduler.
+        """
+        scheduler.add(self)
+
 
 class CredentialsWithQuotaProject(Credentials):
     """Abstract base for credentials supporting ``with_quota_project`` factory"""
@@ -171,6 +171,8 @@ class Credentials(credentials.ReadOnlyScoped, credentials.CredentialsWithQuotaPr
 
         if "_refresh_worker" in state_dict:
             del state_dict["_refresh_worker"]
+        if "_refresh_scheduler" in state_dict:
+            del state_dict["_refresh_scheduler"]
         return state_dict
 
     def __setstate__(self, d):
@@ -197,6 +199,7 @@ class Credentials(credentials.ReadOnlyScoped, credentials.CredentialsWithQuotaPr
         # The refresh_handler setter should be used to repopulate this.
         self._refresh_handler = None
         self._refresh_worker = None
+        self._refresh_scheduler = None
         self._use_non_blocking_refresh = d.get("_use_non_blocking_refresh", False)
         self._account = d.get("_account", "")
 
@@ -26,6 +26,7 @@ import collections.abc
 
 # Standard library imports
 import copy
+import functools
 from email.generator import BytesGenerator
 from email.mime.multipart import MIMEMultipart
 from email.mime.nonmultipart import MIMENonMultipart
@@ -36,7 +37,10 @@ import keyword
 import logging
 import mimetypes
 import os
+import queue
 import re
+import threading
+import types
 import urllib
 
 import google.api_core.client_options
@@ -72,12 +76,16 @@ from googleapiclient.errors import (
     UnknownFileType,
 )
 from googleapiclient.http import (
+    BatchExecutor,
     BatchHttpRequest,
     HttpMock,
     HttpMockSequence,
     HttpRequest,
     MediaFileUpload,
     MediaUpload,
+    _can_clone_http,
+    _clone_http,
+    _is_thread_safe,
     build_http,
 )
 from googleapiclient.model import JsonModel, MediaModel, RawModel
@@ -90,6 +98,10 @@ logger = logging.getLogger(__name__)
 
 URITEMPLATE = re.compile("{[^}]*}")
 VARNAME = re.compile("[a-zA-Z0-9_-]+")
+_URITEMPLATE_EXPRESSION = re.compile("{([^}]+)}")
+_SIMPLE_VARNAME = re.compile("[a-zA-Z0-9_]+")
+# Characters left as is by reserved expansion, see RFC 6570 section 3.2.3.
+_URITEMPLATE_RESERVED = ":/?#[]@!$&'()*+,;="
 DISCOVERY_URI = (
     "https://www.googleapis.com/discovery/v1/apis/" "{api}/{apiVersion}/rest"
 )
@@ -129,6 +141,8 @@ DEFAULT_UNIVERSE = "googleapis.com"
 # TODO(dhermes): Remove 'userip' in 'v2'.
 STACK_QUERY_PARAMETERS = frozenset(["trace", "pp", "userip", "strict"])
 STACK_QUERY_PARAMETER_DEFAULT_VALUE = {"type": "string", "location": "query"}
+# Key under which compiled discovery documents store precomputed method data.
+_COMPILED_METHOD_KEY = "_compiled"
 
 
 class APICoreVersionError(ValueError):
@@ -207,6 +221,7 @@ def build(
     num_retries=1,
     static_discovery=None,
     always_use_jwt_access=False,
+    blueprint_cache=None,
 ):
     """Construct a Resource for interacting with an API.
 
@@ -268,6 +283,11 @@ def build(
       always_use_jwt_access: Boolean, whether always use self signed JWT for service
         account credentials. This only applies to
         google.oauth2.service_account.Credentials.
+      blueprint_cache: googleapiclient.discovery_cache.blueprint.BlueprintCache,
+        an optional on-disk cache of compiled discovery documents. When set,
+        the discovery document is only parsed and fixed up the first time it is
+        seen; later builds, including in other processes, load the compiled
+        document instead.
 
     Returns:
       A Resource object with methods for interacting with the service.
@@ -312,6 +332,10 @@ def build(
                 num_retries=num_retries,
                 static_discovery=static_discovery,
             )
+            if blueprint_cache is not None:
+                content = _load_blueprint(
+                    blueprint_cache, serviceName, version, content
+                )
             service = build_from_document(
                 content,
                 base=discovery_url,
@@ -453,6 +477,77 @@ def _retrieve_discovery_doc(
     return content
 
 
+def _load_blueprint(blueprint_cache, serviceName, version, content):
+    """Loads the compiled discovery document, compiling it if necessary.
+
+    Args:
+      blueprint_cache: googleapiclient.discovery_cache.blueprint.BlueprintCache,
+        the cache of compiled discovery documents.
+      serviceName: string, name of the service.
+      version: string, the version of the service.
+      content: string, the discovery document.
+
+    Returns:
+      The compiled discovery document as a dict.
+    """
+    from .discovery_cache import blueprint
+
+    digest = blueprint.content_digest(content)
+    service = blueprint_cache.get(serviceName, version, digest)
+    if service is None:
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        service = json.loads(content)
+        _compile_resource(service, service, Schemas(service))
+        blueprint_cache.set(serviceName, version, digest, service)
+    return service
+
+
+def _compile_resource(resourceDesc, rootDesc, schema):
+    """Compiles every method of a resource and of its nested resources.
+
+    SIDE EFFECTS: Fixes up each method description and stores the result of
+    _compile_method in it, see createMethod.
+
+    Args:
+      resourceDesc: object, section of deserialized discovery document that
+        describes a resource.
+      rootDesc: object, the entire deserialized discovery document.
+      schema: object, mapping of schema names to schema descriptions.
+    """
+    for methodDesc in resourceDesc.get("methods", {}).values():
+        methodDesc[_COMPILED_METHOD_KEY] = _compile_method(
+            methodDesc, rootDesc, schema
+        )
+    for nestedDesc in resourceDesc.get("resources", {}).values():
+        _compile_resource(nestedDesc, rootDesc, schema)
+
+
+def _compile_method(methodDesc, rootDesc, schema):
+    """Fixes up a method description and precomputes what createMethod needs.
+
+    Args:
+      methodDesc: object, fragment of deserialized discovery document that
+        describes the method.
+      rootDesc: object, the entire deserialized discovery document.
+      schema: object, mapping of schema names to schema descriptions.
+
+    Returns:
+      A dict of plain data, suitable for marshal, with the keys:
+        - "fixup": the result of _fix_up_method_description.
+        - "parameters": the state of the method's ResourceMethodParameters.
+        - "pageTokens": the result of _pageTokenNames.
+        - "itemsField": the result of _itemsFieldName.
+    """
+    fixup = _fix_up_method_description(methodDesc, rootDesc, schema)
+    return {
+        "fixup": fixup,
+        "parameters": dict(vars(ResourceMethodParameters(methodDesc))),
+        "pageTokens": _pageTokenNames(methodDesc, schema),
+        "itemsField": _itemsFieldName(methodDesc, schema),
+    }
+
+
 def _check_api_core_compatible_with_credentials_universe(credentials):
     if not HAS_UNIVERSE:
         credentials_universe = getattr(credentials, "universe_domain", None)
@@ -958,6 +1053,75 @@ def _fix_up_media_path_base_url(media_path_url, base_url):
     )
 
 
+class _PathTemplate(object):
+    """A URI template for the path of a method, parsed once.
+
+    Templates whose expressions are all simple ({var}) or reserved ({+var})
+    expansions of a single variable, which covers the paths of discovery
+    documents, are expanded directly when every value is a string. Anything
+    else is expanded by uritemplate.
+    """
+
+    def __init__(self, template):
+        """Constructor for _PathTemplate.
+
+        Args:
+          template: string, the URI template.
+        """
+        self.template = template
+        self._uritemplate = None
+        # Alternating literal strings and (name, reserved) tuples, or None if
+        # the template needs uritemplate.
+        self._parts = []
+        pos = 0
+        for match in _URITEMPLATE_EXPRESSION.finditer(template):
+            self._parts.append(template[pos : match.start()])
+            expression = match.group(1)
+            reserved = expression.startswith("+")
+            name = expression[1:] if reserved else expression
+            if not _SIMPLE_VARNAME.fullmatch(name):
+                self._parts = None
+                break
+            self._parts.append((name, reserved))
+            pos = match.end()
+        else:
+            self._parts.append(template[pos:])
+
+    def _expand_with_uritemplate(self, params):
+        if self._uritemplate is None:
+            self._uritemplate = uritemplate.URITemplate(self.template)
+        return self._uritemplate.expand(params)
+
+    def expand(self, params):
+        """Expands the template, as uritemplate.expand would.
+
+        Args:
+          params: dict, the values of the template variables.
+
+        Returns:
+          The expanded string.
+        """
+        if self._parts is None:
+            return self._expand_with_uritemplate(params)
+        expanded = []
+        for part in self._parts:
+            if type(part) is str:
+                expanded.append(part)
+                continue
+            name, reserved = part
+            value = params.get(name)
+            if value is None:
+                continue
+            if type(value) is not str:
+                return self._expand_with_uritemplate(params)
+            if not reserved:
+                value = urllib.parse.quote(value, "")
+            elif urllib.parse.unquote(value) == value:
+                value = urllib.parse.quote(value, _URITEMPLATE_RESERVED)
+            expanded.append(value)
+        return "".join(expanded)
+
+
 def _urljoin(base, url):
     """Custom urljoin replacement supporting : before / in url."""
     # In general, it's unsafe to simply join base and url. However, for
@@ -1024,6 +1188,20 @@ class ResourceMethodParameters(object):
 
         self.set_parameters(method_desc)
 
+    @classmethod
+    def from_state(cls, state):
+        """Recreates ResourceMethodParameters from the attributes of another one.
+
+        Args:
+          state: dict, the instance attributes, as stored by _compile_method.
+
+        Returns:
+          A ResourceMethodParameters.
+        """
+        parameters = cls.__new__(cls)
+        parameters.__dict__.update(state)
+        return parameters
+
     def set_parameters(self, method_desc):
         """Populates maps and lists based on method description.
 
@@ -1066,79 +1244,113 @@ class ResourceMethodParameters(object):
                     self.query_params.remove(name)
 
 
-def createMethod(methodName, methodDesc, rootDesc, schema):
-    """Creates a method for attaching to a Resource.
+class _ParameterValidator(object):
+    """Validates and routes the arguments of a method call.
 
-    Args:
-      methodName: string, name of the method to use.
-      methodDesc: object, fragment of deserialized discovery document that
-        describes the method.
-      rootDesc: object, the entire deserialized discovery document.
-      schema: object, mapping of schema names to schema descriptions.
+    Compiled once per method from its ResourceMethodParameters so that a call
+    only does dictionary and set lookups: patterns are pre-compiled, enums and
+    repeated parameters are frozensets and every parameter knows up front
+    whether it goes into the path or the query.
     """
-    methodName = fix_method_name(methodName)
-    (
-        pathUrl,
-        httpMethod,
-        methodId,
-        accept,
-        maxSize,
-        mediaPathUrl,
-    ) = _fix_up_method_description(methodDesc, rootDesc, schema)
 
-    parameters = ResourceMethodParameters(methodDesc)
+    def __init__(self, parameters, pagingResponse):
+        """Constructor for _ParameterValidator.
 
-    def method(self, **kwargs):
-        # Don't bother with doc string, it will be over-written by createMethod.
+        Args:
+          parameters: ResourceMethodParameters, the parameters of the method.
+          pagingResponse: Boolean, whether the response of the method has a
+            page token field.
+        """
+        self.argmap = parameters.argmap
+        # temporary workaround for non-paging methods incorrectly requiring
+        # page token parameter (cf. drive.changes.watch vs. drive.changes.list)
+        self.required_params = tuple(
+            name
+            for name in parameters.required_params
+            if name not in _PAGE_TOKEN_NAMES or pagingResponse
+        )
+        self.pattern_params = tuple(
+            (name, re.compile(regex), regex)
+            for name, regex in parameters.pattern_params.items()
+        )
+        repeated_params = frozenset(parameters.repeated_params)
+        self.enum_params = tuple(
+            (name, frozenset(enums), enums, name in repeated_params)
+            for name, enums in parameters.enum_params.items()
+        )
+        query_params = frozenset(parameters.query_params)
+        # Map from method parameter name to (query parameter name, type,
+        # repeated, in query, in path), only for parameters sent in the URL.
+        self.routes = {}
+        for name, arg in parameters.argmap.items():
+            in_query = name in query_params
+            in_path = name in parameters.path_params
+            if in_query or in_path:
+                self.routes[name] = (
+                    arg,
+                    parameters.param_types.get(name, "string"),
+                    name in repeated_params,
+                    in_query,
+                    in_path,
+                )
 
-        # Validate credentials for the configured universe.
-        self._validate_credentials()
+    def __call__(self, kwargs):
+        """Validates the arguments of a call and splits them by location.
 
+        SIDE EFFECTS: Removes arguments with a value of None from kwargs.
+
+        Args:
+          kwargs: dict, the keyword arguments of the method call.
+
+        Returns:
+          Tuple (path_params, query_params) of dicts from query parameter name
+          to the value cast to a string, or to a list of strings for repeated
+          parameters.
+
+        Raises:
+          TypeError: if an argument is unknown, missing or has an invalid value.
+        """
+        argmap = self.argmap
         for name in kwargs:
-            if name not in parameters.argmap:
+            if name not in argmap:
                 raise TypeError("Got an unexpected keyword argument {}".format(name))
 
         # Remove args that have a value of None.
-        keys = list(kwargs.keys())
-        for name in keys:
-            if kwargs[name] is None:
-                del kwargs[name]
+        for name in [name for name, value in kwargs.items() if value is None]:
+            del kwargs[name]
 
-        for name in parameters.required_params:
+        for name in self.required_params:
             if name not in kwargs:
-                # temporary workaround for non-paging methods incorrectly requiring
-                # page token parameter (cf. drive.changes.watch vs. drive.changes.list)
-                if name not in _PAGE_TOKEN_NAMES or _findPageTokenName(
-                    _methodProperties(methodDesc, schema, "response")
-                ):
-                    raise TypeError('Missing required parameter "%s"' % name)
-
-        for name, regex in parameters.pattern_params.items():
+                raise TypeError('Missing required parameter "%s"' % name)
+
+        for name, compiled, regex in self.pattern_params:
             if name in kwargs:
                 if isinstance(kwargs[name], str):
                     pvalues = [kwargs[name]]
                 else:
                     pvalues = kwargs[name]
                 for pvalue in pvalues:
-                    if re.match(regex, pvalue) is None:
+                    if compiled.match(pvalue) is None:
                         raise TypeError(
                             'Parameter "%s" value "%s" does not match the pattern "%s"'
                             % (name, pvalue, regex)
                         )
 
-        for name, enums in parameters.enum_params.items():
+        for name, allowed, enums, repeated in self.enum_params:
             if name in kwargs:
                 # We need to handle the case of a repeated enum
                 # name differently, since we want to handle both
                 # arg='value' and arg=['value1', 'value2']
-                if name in parameters.repeated_params and not isinstance(
-                    kwargs[name], str
-                ):
+                if repeated and not isinstance(kwargs[name], str):
                     values = kwargs[name]
                 else:
                     values = [kwargs[name]]
                 for value in values:
-                    if value not in enums:
+                    try:
+                        valid = value in allowed
+                    except TypeError:
+                        valid = False
+                    if not valid:
                         raise TypeError(
                             'Parameter "%s" value "%s" is not an allowed value in "%s"'
                             % (name, value, str(enums))
@@ -1146,17 +1358,72 @@ def createMethod(methodName, methodDesc, rootDesc, schema):
 
         actual_query_params = {}
         actual_path_params = {}
+        routes = self.routes
         for key, value in kwargs.items():
-            to_type = parameters.param_types.get(key, "string")
+            route = routes.get(key)
+            if route is None:
+                continue
+            arg, to_type, repeated, in_query, in_path = route
             # For repeated parameters we cast each member of the list.
-            if key in parameters.repeated_params and type(value) == type([]):
+            if repeated and type(value) == type([]):
                 cast_value = [_cast(x, to_type) for x in value]
             else:
                 cast_value = _cast(value, to_type)
-            if key in parameters.query_params:
-                actual_query_params[parameters.argmap[key]] = cast_value
-            if key in parameters.path_params:
-                actual_path_params[parameters.argmap[key]] = cast_value
+            if in_query:
+                actual_query_params[arg] = cast_value
+            if in_path:
+                actual_path_params[arg] = cast_value
+        return actual_path_params, actual_query_params
+
+
+def createMethod(methodName, methodDesc, rootDesc, schema):
+    """Creates a method for attaching to a Resource.
+
+    Args:
+      methodName: string, name of the method to use.
+      methodDesc: object, fragment of deserialized discovery document that
+        describes the method.
+      rootDesc: object, the entire deserialized discovery document.
+      schema: object, mapping of schema names to schema descriptions.
+    """
+    methodName = fix_method_name(methodName)
+    compiled = methodDesc.get(_COMPILED_METHOD_KEY)
+    if compiled is None:
+        fixup = _fix_up_method_description(methodDesc, rootDesc, schema)
+        parameters = ResourceMethodParameters(methodDesc)
+    else:
+        # Compiled discovery documents are already fixed up.
+        fixup = compiled["fixup"]
+        parameters = ResourceMethodParameters.from_state(compiled["parameters"])
+    (pathUrl, httpMethod, methodId, accept, maxSize, mediaPathUrl) = fixup
+    pathTemplate = _PathTemplate(pathUrl)
+    mediaPathTemplate = _PathTemplate(mediaPathUrl) if mediaPathUrl else None
+
+    # Compiled on first call, so building a service only pays for the methods
+    # that are actually used.
+    validator = None
+    isMediaMethod = methodName.endswith("_media")
+    hasResponse = "response" in methodDesc
+    api_version = methodDesc.get("apiVersion", None)
+
+    def method(self, **kwargs):
+        # Don't bother with doc string, it will be over-written by createMethod.
+        nonlocal validator
+
+        # Validate credentials for the configured universe.
+        self._validate_credentials()
+
+        if validator is None:
+            validator = _ParameterValidator(
+                parameters,
+                bool(
+                    _findPageTokenName(
+                        _methodProperties(methodDesc, schema, "response")
+                    )
+                ),
+            )
+        actual_path_params, actual_query_params = validator(kwargs)
+
         body_value = kwargs.get("body", None)
         media_filename = kwargs.get("media_body", None)
         media_mime_type = kwargs.get("media_mime_type", None)
@@ -1165,19 +1432,17 @@ def createMethod(methodName, methodDesc, rootDesc, schema):
             actual_query_params["key"] = self._developerKey
 
         model = self._model
-        if methodName.endswith("_media"):
+        if isMediaMethod:
             model = MediaModel()
-        elif "response" not in methodDesc:
+        elif not hasResponse:
             model = RawModel()
 
-        api_version = methodDesc.get("apiVersion", None)
-
         headers = {}
         headers, params, query, body = model.request(
             headers, actual_path_params, actual_query_params, body_value, api_version
         )
 
-        expanded_url = uritemplate.expand(pathUrl, params)
+        expanded_url = pathTemplate.expand(params)
         url = _urljoin(self._baseUrl, expanded_url + query)
 
         resumable = None
@@ -1207,7 +1472,7 @@ def createMethod(methodName, methodDesc, rootDesc, schema):
                 raise MediaUploadSizeError("Media larger than: %s" % maxSize)
 
             # Use the media path uri for media uploads
-            expanded_url = uritemplate.expand(mediaPathUrl, params)
+            expanded_url = mediaPathTemplate.expand(params)
             url = _urljoin(self._baseUrl, expanded_url + query)
             url = _fix_up_media_path_base_url(url, self._baseUrl)
             if media_upload.resumable():
@@ -1267,6 +1532,26 @@ def createMethod(methodName, methodDesc, rootDesc, schema):
             resumable=resumable,
         )
 
+    def render_doc():
+        return _methodDoc(methodName, methodDesc, rootDesc, schema, parameters)
+
+    return (methodName, _DeferredDocMethod(method, render_doc))
+
+
+def _methodDoc(methodName, methodDesc, rootDesc, schema, parameters):
+    """Renders the docstring of a method created by createMethod.
+
+    Args:
+      methodName: string, fixed name of the method.
+      methodDesc: object, fragment of deserialized discovery document that
+        describes the method.
+      rootDesc: object, the entire deserialized discovery document.
+      schema: object, mapping of schema names to schema descriptions.
+      parameters: ResourceMethodParameters, the parameters of the method.
+
+    Returns:
+      The docstring of the method as a string.
+    """
     docs = [methodDesc.get("description", DEFAULT_METHOD_DOC), "\n\n"]
     if len(parameters.argmap) > 0:
         docs.append("Args:\n")
@@ -1327,8 +1612,47 @@ def createMethod(methodName, methodDesc, rootDesc, schema):
             docs.append("\nReturns:\n  An object of the form:\n\n    ")
             docs.append(schema.prettyPrintSchema(methodDesc["response"]))
 
-    setattr(method, "__doc__", "".join(docs))
-    return (methodName, method)
+    return "".join(docs)
+
+
+class _DeferredDocMethod(object):
+    """A method built from a discovery document whose docstring is lazy.
+
+    Rendering a docstring pretty-prints every schema the method refers to,
+    which costs more than creating the method itself. The docstring is only
+    rendered on first access to __doc__, e.g. by help().
+    """
+
+    def __init__(self, func, render_doc):
+        """Constructor for _DeferredDocMethod.
+
+        Args:
+          func: function, the method implementation taking the Resource as its
+            first argument.
+          render_doc: callable, takes no arguments and returns the docstring.
+        """
+        self._func = func
+        self._render_doc = render_doc
+        self._doc = None
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+        self.__module__ = func.__module__
+        # Lets inspect.signature() and help() see the parameters of func.
+        self.__wrapped__ = func
+
+    def __call__(self, *args, **kwargs):
+        return self._func(*args, **kwargs)
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return types.MethodType(self, obj)
+
+    @property
+    def __doc__(self):
+        if self._doc is None:
+            self._doc = self._render_doc()
+        return self._doc
 
 
 def createNextMethod(
@@ -1392,6 +1716,140 @@ def createNextMethod(
     return (methodName, methodNext)
 
 
+def createIterMethod(methodName, nextMethodName, itemsFieldName):
+    """Creates any _iter methods for attaching to a Resource.
+
+    The _iter methods iterate over every item, or every page, of list()
+    responses, requesting the next pages in the background.
+
+    Args:
+      methodName: string, name of the method to use.
+      nextMethodName: string, name of the _next method to get the next pages
+          with.
+      itemsFieldName: string, name of the response field holding the items of
+          a page, or None if there is no single such field.
+    """
+    methodName = fix_method_name(methodName)
+    nextMethodName = fix_method_name(nextMethodName)
+
+    def methodIter(
+        self, request, pages=False, prefetch=1, num_retries=0, http_factory=None
+    ):
+        """Iterates over the results of every page, starting from request.
+
+        The next page is requested in a single background thread as soon as
+        the previous page is received, while its items are being consumed.
+        Pages are requested over a transport returned by http_factory, or by
+        default over a clone of the http object of the request when it is a
+        plain httplib2.Http or AuthorizedHttp that is not thread-safe, so that
+        the loop body can keep sending requests over that http object. Other
+        http objects, such as a PooledHttp (see build_http) or a mock, are
+        used by the background thread as they are: if such an http object is
+        not thread-safe, do not send other requests over it while iterating,
+        or pass prefetch=0.
+
+        Args:
+          request: The request for the first page. (required)
+          pages: Boolean, True to iterate over the responses for the pages rather
+            than over their items.
+          prefetch: int, maximum number of pages requested ahead of the page being
+            consumed. With 0, pages are requested one after the other in the
+            calling thread, like with the _next method.
+          num_retries: int, number of times to retry each page request, see
+            HttpRequest.execute.
+          http_factory: callable, returns a new httplib2.Http object to request
+            pages with in the background, which is closed once the iteration
+            is over.
+
+        Returns:
+          An iterator over the items, or over the responses if pages is True.
+        """
+        if not pages and itemsFieldName is None:
+            raise ValueError(
+                "The responses of %s have no items field, use pages=True."
+                % methodName
+            )
+        return _iterPages(
+            request,
+            getattr(self, nextMethodName),
+            None if pages else itemsFieldName,
+            prefetch,
+            num_retries,
+            http_factory,
+        )
+
+    return (methodName, methodIter)
+
+
+_NO_MORE_PAGES = object()
+
+
+def _iterPages(
+    request, nextMethod, itemsFieldName, prefetch, num_retries, http_factory
+):
+    """Generates the responses, or items, of every page, see createIterMethod."""
+    if prefetch < 1:
+        while request is not None:
+            response = request.execute(num_retries=num_retries)
+            if itemsFieldName is None:
+                yield response
+            else:
+                yield from response.get(itemsFieldName, ())
+            request = nextMethod(request, response)
+        return
+
+    if (
+        http_factory is None
+        and not _is_thread_safe(request.http)
+        and _can_clone_http(request.http)
+    ):
+        http_factory = functools.partial(_clone_http, request.http)
+    if http_factory is None:
+        http = request.http
+    else:
+        http = http_factory()
+
+    # A slot is taken for each page requested and given back once the page is
+    # consumed, so at most prefetch pages are requested ahead.
+    slots = threading.Semaphore(prefetch)
+    results = queue.Queue()
+    stopped = threading.Event()
+
+    def fetch(request):
+        try:
+            while request is not None:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                response = request.execute(http=http, num_retries=num_retries)
+                results.put((response, None))
+                request = nextMethod(request, response)
+            results.put((_NO_MORE_PAGES, None))
+        except Exception as e:
+            results.put((None, e))
+        finally:
+            if http_factory is not None:
+                http.close()
+
+    threading.Thread(target=fetch, args=(request,), daemon=True).start()
+    try:
+        while True:
+            response, exception = results.get()
+            if exception is not None:
+                raise exception
+            if response is _NO_MORE_PAGES:
+                return
+            slots.release()
+            if itemsFieldName is None:
+                yield response
+            else:
+                yield from response.get(itemsFieldName, ())
+    finally:
+        # Lets the background thread stop, after the request in flight.
+        stopped.set()
+        slots.release()
+
+
 class Resource(object):
     """A class for interacting with a resource."""
 
@@ -1406,6 +1864,7 @@ class Resource(object):
         rootDesc,
         schema,
         universe_domain=universe.DEFAULT_UNIVERSE if HAS_UNIVERSE else "",
+        method_tables=None,
     ):
         """Build a Resource from the API description.
 
@@ -1425,6 +1884,9 @@ class Resource(object):
           schema: object, mapping of schema names to schema descriptions.
           universe_domain: string, the universe for the API. The default universe
           is "googleapis.com".
+          method_tables: dict, cache of compiled method tables shared by every
+              Resource of the same service, keyed by the id of the resource
+              description. A new cache is created if None.
         """
         self._dynamic_attrs = []
 
@@ -1438,6 +1900,7 @@ class Resource(object):
         self._schema = schema
         self._universe_domain = universe_domain
         self._credentials_validated = False
+        self._method_tables = {} if method_tables is None else method_tables
 
         self._set_service_methods()
 
@@ -1461,6 +1924,7 @@ class Resource(object):
         for dynamic_attr in self._dynamic_attrs:
             del state_dict[dynamic_attr]
         del state_dict["_dynamic_attrs"]
+        state_dict.pop("_method_tables", None)
         return state_dict
 
     def __setstate__(self, state):
@@ -1471,6 +1935,7 @@ class Resource(object):
         """
         self.__dict__.update(state)
         self._dynamic_attrs = []
+        self._method_tables = {}
         self._set_service_methods()
 
     def __enter__(self):
@@ -1487,12 +1952,26 @@ class Resource(object):
         self._http.close()
 
     def _set_service_methods(self):
-        self._add_basic_methods(self._resourceDesc, self._rootDesc, self._schema)
-        self._add_nested_resources(self._resourceDesc, self._rootDesc, self._schema)
-        self._add_next_methods(self._resourceDesc, self._schema)
-
-    def _add_basic_methods(self, resourceDesc, rootDesc, schema):
-        # If this is the root Resource, add a new_batch_http_request() method.
+        # The methods of a resource only depend on its description, so they are
+        # compiled once per service and shared by every Resource built from the
+        # same description. Each Resource only binds the shared functions.
+        table = self._method_tables.get(id(self._resourceDesc))
+        if table is None:
+            table = []
+            self._add_basic_methods(
+                table, self._resourceDesc, self._rootDesc, self._schema
+            )
+            self._add_nested_resources(
+                table, self._resourceDesc, self._rootDesc, self._schema
+            )
+            self._add_next_methods(table, self._resourceDesc, self._schema)
+            self._method_tables[id(self._resourceDesc)] = table
+        for methodName, method in table:
+            self._set_dynamic_attr(methodName, method.__get__(self, self.__class__))
+
+    def _add_basic_methods(self, table, resourceDesc, rootDesc, schema):
+        # If this is the root Resource, add new_batch_http_request() and
+        # new_batch_executor() methods.
         if resourceDesc == rootDesc:
             batch_uri = "%s%s" % (
                 rootDesc["rootUrl"],
@@ -1515,28 +1994,40 @@ class Resource(object):
                 """
                 return BatchHttpRequest(callback=callback, batch_uri=batch_uri)
 
-            self._set_dynamic_attr("new_batch_http_request", new_batch_http_request)
+            table.append(
+                ("new_batch_http_request", staticmethod(new_batch_http_request))
+            )
+
+            def new_batch_executor(callback=None, **kwargs):
+                """Create a BatchExecutor object based on the discovery document.
+
+                Args:
+                  callback: callable, A callback to be called for each response, of the
+                    form callback(id, response, exception), see new_batch_http_request.
+                  **kwargs: other arguments of the BatchExecutor constructor:
+                    batch_size, max_workers, num_retries and http_factory.
+
+                Returns:
+                  A BatchExecutor object based on the discovery document.
+                """
+                return BatchExecutor(callback=callback, batch_uri=batch_uri, **kwargs)
+
+            table.append(("new_batch_executor", staticmethod(new_batch_executor)))
 
         # Add basic methods to Resource
         if "methods" in resourceDesc:
             for methodName, methodDesc in resourceDesc["methods"].items():
-                fixedMethodName, method = createMethod(
-                    methodName, methodDesc, rootDesc, schema
-                )
-                self._set_dynamic_attr(
-                    fixedMethodName, method.__get__(self, self.__class__)
-                )
+                table.append(createMethod(methodName, methodDesc, rootDesc, schema))
                 # Add in _media methods. The functionality of the attached method will
                 # change when it sees that the method name ends in _media.
                 if methodDesc.get("supportsMediaDownload", False):
-                    fixedMethodName, method = createMethod(
-                        methodName + "_media", methodDesc, rootDesc, schema
-                    )
-                    self._set_dynamic_attr(
-                        fixedMethodName, method.__get__(self, self.__class__)
+                    table.append(
+                        createMethod(
+                            methodName + "_media", methodDesc, rootDesc, schema
+                        )
                     )
 
-    def _add_nested_resources(self, resourceDesc, rootDesc, schema):
+    def _add_nested_resources(self, table, resourceDesc, rootDesc, schema):
         # Add in nested resources
         if "resources" in resourceDesc:
 
@@ -1561,6 +2052,7 @@ class Resource(object):
                         rootDesc=rootDesc,
                         schema=schema,
                         universe_domain=self._universe_domain,
+                        method_tables=self._method_tables,
                     )
 
                 setattr(methodResource, "__doc__", "A collection resource.")
@@ -1569,40 +2061,42 @@ class Resource(object):
                 return (methodName, methodResource)
 
             for methodName, methodDesc in resourceDesc["resources"].items():
-                fixedMethodName, method = createResourceMethod(methodName, methodDesc)
-                self._set_dynamic_attr(
-                    fixedMethodName, method.__get__(self, self.__class__)
-                )
+                table.append(createResourceMethod(methodName, methodDesc))
 
-    def _add_next_methods(self, resourceDesc, schema):
-        # Add _next() methods if and only if one of the names 'pageToken' or
-        # 'nextPageToken' occurs among the fields of both the method's response
-        # type either the method's request (query parameters) or request body.
+    def _add_next_methods(self, table, resourceDesc, schema):
+        # Add _next() and _iter() methods if and only if one of the names
+        # 'pageToken' or 'nextPageToken' occurs among the fields of both the
+        # method's response type either the method's request (query parameters)
+        # or request body.
         if "methods" not in resourceDesc:
             return
         for methodName, methodDesc in resourceDesc["methods"].items():
-            nextPageTokenName = _findPageTokenName(
-                _methodProperties(methodDesc, schema, "response")
-            )
-            if not nextPageTokenName:
+            compiled = methodDesc.get(_COMPILED_METHOD_KEY)
+            if compiled is None:
+                pageTokens = _pageTokenNames(methodDesc, schema)
+            else:
+                pageTokens = compiled["pageTokens"]
+            if pageTokens is None:
                 continue
-            isPageTokenParameter = True
-            pageTokenName = _findPageTokenName(methodDesc.get("parameters", {}))
-            if not pageTokenName:
-                isPageTokenParameter = False
-                pageTokenName = _findPageTokenName(
-                    _methodProperties(methodDesc, schema, "request")
+            if compiled is None:
+                itemsField = _itemsFieldName(methodDesc, schema)
+            else:
+                itemsField = compiled["itemsField"]
+            pageTokenName, nextPageTokenName, isPageTokenParameter = pageTokens
+            table.append(
+                createNextMethod(
+                    methodName + "_next",
+                    pageTokenName,
+                    nextPageTokenName,
+                    isPageTokenParameter,
                 )
-            if not pageTokenName:
-                continue
-            fixedMethodName, method = createNextMethod(
-                methodName + "_next",
-                pageTokenName,
-                nextPageTokenName,
-                isPageTokenParameter,
             )
-            self._set_dynamic_attr(
-                fixedMethodName, method.__get__(self, self.__class__)
+            table.append(
+                createIterMethod(
+                    methodName + "_iter",
+                    methodName + "_next",
+                    itemsField,
+                )
             )
 
     def _validate_credentials(self):
@@ -1627,6 +2121,61 @@ class Resource(object):
         return self._credentials_validated
 
 
+def _pageTokenNames(methodDesc, schema):
+    """Finds the page token fields of a method, if it supports paging.
+
+    Args:
+      methodDesc: object, fragment of deserialized discovery document that
+        describes the method.
+      schema: object, mapping of schema names to schema descriptions.
+
+    Returns:
+      Tuple (pageTokenName, nextPageTokenName, isPageTokenParameter) where
+      isPageTokenParameter is True if the request page token is a query
+      parameter and False if it is a field of the request body, or None if
+      the method does not support paging.
+    """
+    nextPageTokenName = _findPageTokenName(
+        _methodProperties(methodDesc, schema, "response")
+    )
+    if not nextPageTokenName:
+        return None
+    isPageTokenParameter = True
+    pageTokenName = _findPageTokenName(methodDesc.get("parameters", {}))
+    if not pageTokenName:
+        isPageTokenParameter = False
+        pageTokenName = _findPageTokenName(
+            _methodProperties(methodDesc, schema, "request")
+        )
+    if not pageTokenName:
+        return None
+    return (pageTokenName, nextPageTokenName, isPageTokenParameter)
+
+
+def _itemsFieldName(methodDesc, schema):
+    """Finds the field holding the items of a page of results.
+
+    Args:
+      methodDesc: object, fragment of deserialized discovery document that
+        describes the method.
+      schema: object, mapping of schema names to schema descriptions.
+
+    Returns:
+      'items' if the response has such an array field, otherwise the name of
+      its only array field, or None.
+    """
+    arrays = [
+        name
+        for name, desc in _methodProperties(methodDesc, schema, "response").items()
+        if desc.get("type") == "array"
+    ]
+    if "items" in arrays:
+        return "items"
+    if len(arrays) == 1:
+        return arrays[0]
+    return None
+
+
 def _findPageTokenName(fields):
     """Search field names for one like a page token.
 
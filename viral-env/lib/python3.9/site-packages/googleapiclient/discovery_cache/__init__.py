@@ -25,6 +25,13 @@ DISCOVERY_DOC_MAX_AGE = 60 * 60 * 24  # 1 day
 DISCOVERY_DOC_DIR = os.path.join(
     os.path.dirname(os.path.realpath(__file__)), "documents"
 )
+# Optional packed copy of DISCOVERY_DOC_DIR, see discovery_cache.pack.
+DISCOVERY_DOC_PACK = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "documents.pack"
+)
+
+_static_pack = None
+_static_pack_loaded = False
 
 
 def autodetect():
@@ -52,10 +59,56 @@ def autodetect():
         return None
 
 
+def _get_mtime(path):
+    """Returns the st_mtime_ns of path, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _get_static_pack():
+    """Opens the archive at DISCOVERY_DOC_PACK once per process.
+
+    The archive is ignored if documents were added to or removed from
+    DISCOVERY_DOC_DIR since it was built.
+
+    Returns:
+      googleapiclient.discovery_cache.pack.DocumentPack, or None if there is
+      no usable archive.
+    """
+    global _static_pack, _static_pack_loaded
+    if not _static_pack_loaded:
+        if os.path.exists(DISCOVERY_DOC_PACK):
+            from . import pack
+
+            try:
+                static_pack = pack.DocumentPack(DISCOVERY_DOC_PACK)
+            except (OSError, ValueError, KeyError) as e:
+                LOGGER.warning(e, exc_info=True)
+            else:
+                directory_mtime = _get_mtime(DISCOVERY_DOC_DIR)
+                if directory_mtime not in (None, static_pack.directory_mtime):
+                    LOGGER.warning(
+                        "Ignoring %s, %s has changed since it was built",
+                        DISCOVERY_DOC_PACK,
+                        DISCOVERY_DOC_DIR,
+                    )
+                    static_pack.close()
+                else:
+                    _static_pack = static_pack
+        _static_pack_loaded = True
+    return _static_pack
+
+
 def get_static_doc(serviceName, version):
     """Retrieves the discovery document from the directory defined in
     DISCOVERY_DOC_DIR corresponding to the serviceName and version provided.
 
+    If the packed archive DISCOVERY_DOC_PACK exists, the document is read from
+    it instead, unless the document file has changed since the archive was
+    built.
+
     Args:
         serviceName: string, name of the service.
         version: string, the version of the service.
@@ -67,9 +120,23 @@ def get_static_doc(serviceName, version):
 
     content = None
     doc_name = "{}.{}.json".format(serviceName, version)
+    doc_path = os.path.join(DISCOVERY_DOC_DIR, doc_name)
+
+    static_pack = _get_static_pack()
+    if static_pack is not None:
+        packed_mtime = static_pack.mtime(serviceName, version)
+        if packed_mtime is not None:
+            if _get_mtime(doc_path) in (None, packed_mtime):
+                return static_pack.get(serviceName, version)
+            LOGGER.warning(
+                "Ignoring the packed copy of %s, the file has changed since %s "
+                "was built",
+                doc_path,
+                DISCOVERY_DOC_PACK,
+            )
 
     try:
-        with open(os.path.join(DISCOVERY_DOC_DIR, doc_name), "r") as f:
+        with open(doc_path, "r") as f:
             content = f.read()
     except FileNotFoundError:
         # File does not exist. Nothing to do here.
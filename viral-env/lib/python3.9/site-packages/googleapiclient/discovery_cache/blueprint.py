@@ -0,0 +1,177 @@
+# Copyright 2014 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""File based cache for compiled discovery documents ("blueprints").
+
+A blueprint is a discovery document whose methods have already been fixed up
+and had their parameters parsed by googleapiclient.discovery. Blueprints are
+stored with marshal, which loads considerably faster than JSON, so that
+short-lived processes can skip both the JSON parsing and the fix-up of the
+discovery document on start.
+
+marshal is not secure against maliciously constructed data, so blueprints are
+only read from a directory that no other user can write to. The default
+directory is private to the current user.
+
+Each blueprint is stored in its own file, keyed by service name, version and
+the digest of the discovery document it was compiled from. Files are written
+to a temporary file and renamed into place, so multiple processes can share
+the same directory.
+"""
+
+import hashlib
+import logging
+import marshal
+import os
+import stat
+import sys
+import tempfile
+
+LOGGER = logging.getLogger(__name__)
+
+# Bump whenever the layout of compiled method descriptions changes.
+BLUEPRINT_FORMAT = 2
+DIRNAME = "google-api-python-client-discovery-blueprints"
+
+
+def content_digest(content):
+    """Returns the hex digest identifying a discovery document.
+
+    Args:
+      content: string or bytes, the discovery document.
+
+    Returns:
+      string, the SHA-256 hex digest of the document.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def _default_directory():
+    """Returns a directory of the system temporary directory for the user."""
+    if hasattr(os, "getuid"):
+        return os.path.join(tempfile.gettempdir(), "%s-%d" % (DIRNAME, os.getuid()))
+    return os.path.join(tempfile.gettempdir(), DIRNAME)
+
+
+class BlueprintCache(object):
+    """A directory of compiled discovery documents."""
+
+    def __init__(self, directory=None):
+        """Constructor.
+
+        Args:
+          directory: string, directory holding the blueprints, created with mode
+            0700 if it does not exist. It must be owned by the current user and
+            not writable by other users, otherwise the cache is disabled.
+            Defaults to a directory of the current user in the system temporary
+            directory.
+        """
+        if directory is None:
+            directory = _default_directory()
+        self._directory = directory
+        self._trusted = None
+
+    def _is_trusted(self):
+        """Creates the directory if needed, and checks that it is safe to use."""
+        if self._trusted is None:
+            self._trusted = self._check_directory()
+        return self._trusted
+
+    def _check_directory(self):
+        try:
+            os.makedirs(self._directory, mode=0o700, exist_ok=True)
+            st = os.lstat(self._directory)
+        except OSError as e:
+            LOGGER.warning(e, exc_info=True)
+            return False
+        if not stat.S_ISDIR(st.st_mode):
+            LOGGER.warning(
+                "Not using %s for blueprints, not a directory", self._directory
+            )
+            return False
+        if hasattr(os, "getuid") and (
+            st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+        ):
+            LOGGER.warning(
+                "Not using %s for blueprints, other users can write to it",
+                self._directory,
+            )
+            return False
+        return True
+
+    def _path(self, serviceName, version, digest):
+        filename = "%s.%s.%s.%s.blueprint" % (
+            serviceName,
+            version,
+            digest,
+            sys.implementation.cache_tag,
+        )
+        return os.path.join(self._directory, filename)
+
+    def get(self, serviceName, version, digest):
+        """Loads a blueprint.
+
+        Args:
+          serviceName: string, name of the service.
+          version: string, the version of the service.
+          digest: string, digest of the discovery document, see content_digest.
+
+        Returns:
+          dict, the compiled discovery document, or None if there is no usable
+          blueprint for the given key.
+        """
+        if not self._is_trusted():
+            return None
+        try:
+            with open(self._path(serviceName, version, digest), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            blueprint_format, blueprint_digest, service = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            LOGGER.warning(
+                "Ignoring corrupted blueprint for %s %s", serviceName, version
+            )
+            return None
+        if blueprint_format != BLUEPRINT_FORMAT or blueprint_digest != digest:
+            return None
+        return service
+
+    def set(self, serviceName, version, digest, service):
+        """Stores a blueprint.
+
+        Args:
+          serviceName: string, name of the service.
+          version: string, the version of the service.
+          digest: string, digest of the discovery document, see content_digest.
+          service: dict, the compiled discovery document.
+        """
+        if not self._is_trusted():
+            return
+        path = self._path(serviceName, version, digest)
+        try:
+            data = marshal.dumps((BLUEPRINT_FORMAT, digest, service))
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            LOGGER.warning(e, exc_info=True)
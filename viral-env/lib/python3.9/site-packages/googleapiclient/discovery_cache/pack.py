@@ -0,0 +1,195 @@
+# Copyright 2014 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Packed store for the static discovery documents.
+
+All the documents of a directory are stored in a single archive, behind an
+index by (serviceName, version). The archive is memory-mapped, so a lookup
+only touches the index and the pages of the requested document. Documents may
+be stored zlib-compressed.
+
+The index records the modification times of the directory and of each
+document, so readers can tell when the archive is out of date.
+
+Layout of the archive:
+  - MAGIC, then the length of the index as a 4-byte big-endian integer.
+  - The index, a JSON object with the keys:
+      - "directory_mtime": the st_mtime_ns of the directory.
+      - "documents": an object mapping "serviceName.version" to
+        [offset, length, compressed, mtime] where offset is relative to the
+        end of the index and mtime is the st_mtime_ns of the document.
+  - The documents.
+
+The archive is not shipped, since the modification times it records change
+with every checkout or install of the documents. To (re)generate it next to
+the bundled documents, after installing them, run:
+  python -m googleapiclient.discovery_cache.pack [--compress]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+
+MAGIC = b"GAPIDOCPACK2"
+_INDEX_LENGTH = struct.Struct(">I")
+_HEADER_SIZE = len(MAGIC) + _INDEX_LENGTH.size
+
+
+def _doc_key(serviceName, version):
+    return "{}.{}".format(serviceName, version)
+
+
+class DocumentPack(object):
+    """Read-only access to a packed store of discovery documents."""
+
+    def __init__(self, path):
+        """Constructor.
+
+        Args:
+          path: string, path of the archive.
+
+        Raises:
+          OSError: if the archive can not be opened.
+          ValueError: if the file is not a valid archive.
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(
+                "%s is not a discovery document pack, or was built by another "
+                "version, regenerate it" % path
+            )
+        (index_length,) = _INDEX_LENGTH.unpack_from(self._mmap, len(MAGIC))
+        self._data_offset = _HEADER_SIZE + index_length
+        index = json.loads(self._mmap[_HEADER_SIZE : self._data_offset].decode("utf-8"))
+        self.directory_mtime = index["directory_mtime"]
+        self._index = index["documents"]
+
+    def mtime(self, serviceName, version):
+        """Returns the modification time of a document when it was packed.
+
+        Args:
+          serviceName: string, name of the service.
+          version: string, the version of the service.
+
+        Returns:
+          The st_mtime_ns of the document file, or None if the document is not
+          in the archive.
+        """
+        entry = self._index.get(_doc_key(serviceName, version))
+        return None if entry is None else entry[3]
+
+    def get(self, serviceName, version):
+        """Retrieves a discovery document.
+
+        Args:
+          serviceName: string, name of the service.
+          version: string, the version of the service.
+
+        Returns:
+          A string containing the JSON discovery document, or None if the
+          document is not in the archive.
+        """
+        entry = self._index.get(_doc_key(serviceName, version))
+        if entry is None:
+            return None
+        offset, length, compressed, _ = entry
+        start = self._data_offset + offset
+        content = self._mmap[start : start + length]
+        if compressed:
+            content = zlib.decompress(content)
+        return content.decode("utf-8")
+
+    def close(self):
+        self._mmap.close()
+
+
+def write_pack(path, directory, compress=False):
+    """Packs every JSON discovery document of a directory into an archive.
+
+    The archive is written to a temporary file and renamed into place, so
+    processes reading the previous archive are not affected.
+
+    Args:
+      path: string, path of the archive to write.
+      directory: string, directory holding the "serviceName.version.json"
+        discovery documents.
+      compress: Boolean, whether to store documents zlib-compressed, trading
+        lookup time for a much smaller archive. Documents that do not get
+        smaller are stored as is.
+    """
+    index = {}
+    chunks = []
+    offset = 0
+    directory_mtime = os.stat(directory).st_mtime_ns
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(directory, filename), "rb") as f:
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            content = f.read()
+        compressed = False
+        if compress:
+            packed = zlib.compress(content, 9)
+            if len(packed) < len(content):
+                content = packed
+                compressed = True
+        index[filename[: -len(".json")]] = [offset, len(content), compressed, mtime]
+        chunks.append(content)
+        offset += len(content)
+
+    index = {"directory_mtime": directory_mtime, "documents": index}
+    index_bytes = json.dumps(index, separators=(",", ":"), sort_keys=True).encode(
+        "utf-8"
+    )
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_INDEX_LENGTH.pack(len(index_bytes)))
+            f.write(index_bytes)
+            for content in chunks:
+                f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main(argv=None):
+    """Packs the bundled documents of DISCOVERY_DOC_DIR into DISCOVERY_DOC_PACK.
+
+    Args:
+      argv: list of string, the command line arguments, "--compress" to store
+        the documents compressed. Defaults to sys.argv[1:].
+    """
+    from googleapiclient import discovery_cache
+
+    if argv is None:
+        argv = sys.argv[1:]
+    write_pack(
+        discovery_cache.DISCOVERY_DOC_PACK,
+        discovery_cache.DISCOVERY_DOC_DIR,
+        compress="--compress" in argv,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,15 +22,24 @@ from __future__ import absolute_import
 
 __author__ = "jcgregorio@google.com (Joe Gregorio)"
 
+import collections
+import concurrent.futures
 import copy
+import datetime
+import functools
 import http.client as http_client
 import io
 import json
 import logging
 import mimetypes
+import mmap
 import os
+import queue
 import random
+import re
 import socket
+import sys
+import threading
 import time
 import urllib
 import uuid
@@ -46,9 +55,11 @@ else:
     _ssl_SSLError = ssl.SSLError
 
 from email.generator import Generator
-from email.mime.multipart import MIMEMultipart
+from email.message import Message
 from email.mime.nonmultipart import MIMENonMultipart
 from email.parser import FeedParser
+from email.policy import compat32
+from email.utils import parsedate_to_datetime
 
 from googleapiclient import _auth
 from googleapiclient import _helpers as util
@@ -66,6 +77,8 @@ LOGGER = logging.getLogger(__name__)
 
 DEFAULT_CHUNK_SIZE = 100 * 1024 * 1024
 
+DEFAULT_PARALLEL_CHUNK_SIZE = 8 * 1024 * 1024
+
 MAX_URI_LENGTH = 2048
 
 MAX_BATCH_LIMIT = 1000
@@ -76,6 +89,18 @@ DEFAULT_HTTP_TIMEOUT_SEC = 60
 
 _LEGACY_BATCH_URI = "https://www.googleapis.com/batch"
 
+# Names of the socket errors after which a request is retried.
+_RETRYABLE_SOCKET_ERRORS = frozenset(
+    [
+        "WSAETIMEDOUT",
+        "ETIMEDOUT",
+        "EPIPE",
+        "ECONNABORTED",
+        "ECONNREFUSED",
+        "ECONNRESET",
+    ]
+)
+
 
 def _should_retry_response(resp_status, content):
     """Determines whether a response should be retried.
@@ -104,6 +129,11 @@ def _should_retry_response(resp_status, content):
         if not content:
             return False
 
+        # Only rate limit errors are retried, no need to parse anything else.
+        if not _mentions_rate_limit(content):
+            LOGGER.warning("Encountered 403 Forbidden, not a rate limit error")
+            return False
+
         # Content is in JSON format.
         try:
             data = json.loads(content.decode("utf-8"))
@@ -147,14 +177,48 @@ def _should_retry_response(resp_status, content):
     return False
 
 
+def _mentions_rate_limit(content):
+    """Whether an error body may carry a rate limit reason.
+
+    Both reasons retried by _should_retry_response contain "ateLimitExceeded",
+    which spares parsing the JSON of other errors.
+    """
+    if isinstance(content, str):
+        return "ateLimitExceeded" in content
+    return b"ateLimitExceeded" in content
+
+
+def _is_rate_limited(resp_status, content):
+    """Whether a response is a rate limit error, as fed to a RateGovernor."""
+    if resp_status == _TOO_MANY_REQUESTS:
+        return True
+    return (
+        resp_status == http_client.FORBIDDEN
+        and bool(content)
+        and _mentions_rate_limit(content)
+    )
+
+
 def _retry_request(
-    http, num_retries, req_type, sleep, rand, uri, method, *args, **kwargs
+    http,
+    num_retries,
+    req_type,
+    sleep,
+    rand,
+    uri,
+    method,
+    *args,
+    governor_key=None,
+    **kwargs
 ):
     """Retries an HTTP request multiple times while handling errors.
 
     If after all retries the request still fails, last error is either returned as
     return value (for HTTP 5xx errors) or thrown (for ssl.SSLError).
 
+    Every attempt is paced by the rate governor, if one is set, see
+    set_rate_governor.
+
     Args:
       http: Http object to be used to execute request.
       num_retries: Maximum number of retries.
@@ -162,6 +226,8 @@ def _retry_request(
       sleep, rand: Functions to sleep for random time between retries.
       uri: URI to be requested.
       method: HTTP method to be used.
+      governor_key: string, the methodId of the request, the key the rate
+        governor paces the request with.
       args, kwargs: Additional arguments passed to http.request.
 
     Returns:
@@ -188,7 +254,9 @@ def _retry_request(
 
         try:
             exception = None
-            resp, content = http.request(uri, method, *args, **kwargs)
+            resp, content = _governed_request(
+                governor_key, http, uri, method, *args, **kwargs
+            )
         # Retry on SSL errors and socket timeout errors.
         except _ssl_SSLError as ssl_error:
             exception = ssl_error
@@ -204,14 +272,10 @@ def _retry_request(
             # Some of these same errors may have been caught above, e.g. ECONNRESET *should* be
             # raised as a ConnectionError, but some libraries will raise it as a socket.error
             # with an errno corresponding to ECONNRESET
-            if socket.errno.errorcode.get(socket_error.errno) not in {
-                "WSAETIMEDOUT",
-                "ETIMEDOUT",
-                "EPIPE",
-                "ECONNABORTED",
-                "ECONNREFUSED",
-                "ECONNRESET",
-            }:
+            if (
+                socket.errno.errorcode.get(socket_error.errno)
+                not in _RETRYABLE_SOCKET_ERRORS
+            ):
                 raise
             exception = socket_error
         except httplib2.ServerNotFoundError as server_not_found_error:
@@ -229,6 +293,422 @@ def _retry_request(
     return resp, content
 
 
+def _governed_request(key, http, *args, **kwargs):
+    """Sends a request with http.request, paced by the rate governor.
+
+    Args:
+      key: string, the methodId of the request, or None.
+      http: Http object to be used to execute request.
+      args, kwargs: Arguments passed to http.request.
+
+    Returns:
+      resp, content - Response from the http request.
+    """
+    governor = _rate_governor
+    if governor is None:
+        return http.request(*args, **kwargs)
+    governor.acquire(key)
+    try:
+        resp, content = http.request(*args, **kwargs)
+    except BaseException:
+        governor.record(key, None, False)
+        raise
+    governor.record(key, resp, _is_rate_limited(resp.status, content))
+    return resp, content
+
+
+def _retry_after(resp):
+    """Returns the delay in seconds asked for by a Retry-After header, or None."""
+    value = resp.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (date - now).total_seconds())
+
+
+class RateGovernor(object):
+    """Paces the requests of a process.
+
+    A rate governor set with set_rate_governor is shared by every thread. Each
+    request sent by HttpRequest.execute or a media download, and each
+    sub-request of a BatchHttpRequest, first waits in acquire() for permission
+    to be sent, and its response is then passed to record(), so that the
+    governor can slow down when the API returns rate limit errors.
+
+    Requests are keyed by the methodId of the API method, or None.
+
+    This base class lets every request through; subclass it to implement a
+    different policy.
+    """
+
+    def acquire(self, key, count=1):
+        """Waits until requests may be sent.
+
+        Args:
+          key: string, the methodId of the requests, or None.
+          count: int, the number of requests, more than one for a batch.
+        """
+
+    def record(self, key, resp, throttled):
+        """Records the outcome of a request, once per request acquired.
+
+        Args:
+          key: string, the methodId of the request, or None.
+          resp: httplib2.Response, the response, or None if the request failed
+            without one.
+          throttled: bool, True if the response is a rate limit error, that is
+            a 429, or a 403 with a rate limit reason.
+        """
+
+    def stats(self):
+        """Returns metrics per key, a dict of dicts."""
+        return {}
+
+
+class _Limit(object):
+    """The state of an AdaptiveRateGovernor for a single key."""
+
+    def __init__(self, rate, now):
+        self.rate = rate
+        # Theoretical time of the next request, in the past while there is
+        # burst credit left.
+        self.next_time = now
+        self.blocked_until = float("-inf")
+        self.last_change = now
+        self.last_decrease = None
+        # Bumped when the schedule is reset, so that waiting requests take a
+        # new place.
+        self.epoch = 0
+        self.saturated = False
+        self.waiting = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+
+
+class AdaptiveRateGovernor(RateGovernor):
+    """Rate limits requests per key, adapting to rate limit errors (AIMD).
+
+    Requests of each key are spaced out to at most `rate` per second, with
+    bursts of up to `burst` seconds' worth of requests, in the order they
+    arrive. Without rate limit errors, the rate of a key that has requests
+    waiting grows by `increase` requests per second every second (additive
+    increase), up to max_rate. A rate limit error multiplies the rate by
+    `decrease` (multiplicative decrease), down to min_rate, at most once per
+    `cooldown` seconds, since the requests in flight when the limit is hit
+    tend to all fail together. A Retry-After header on a rate limit error or
+    a 503 holds back all the requests of the key until then.
+
+    Example:
+      from googleapiclient.http import AdaptiveRateGovernor, set_rate_governor
+
+      set_rate_governor(AdaptiveRateGovernor(rate=50, max_rate=100))
+    """
+
+    def __init__(
+        self,
+        rate=10.0,
+        max_rate=None,
+        min_rate=0.1,
+        burst=1.0,
+        increase=1.0,
+        decrease=0.5,
+        cooldown=1.0,
+    ):
+        """Constructor for an AdaptiveRateGovernor.
+
+        Args:
+          rate: float, initial rate of each key, in requests per second.
+          max_rate: float, maximum rate, or None for no maximum.
+          min_rate: float, minimum rate.
+          burst: float, seconds of unused rate that may be spent at once.
+          increase: float, rate added per second without rate limit errors.
+          decrease: float, factor applied to the rate on a rate limit error.
+          cooldown: float, minimum number of seconds between two decreases.
+        """
+        if not 0 < min_rate <= rate:
+            raise ValueError("rate must be at least min_rate, and positive")
+        if max_rate is not None and max_rate < rate:
+            raise ValueError("max_rate must be at least rate")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1, got %r" % decrease)
+        self._rate = rate
+        self._max_rate = max_rate
+        self._min_rate = min_rate
+        self._burst = burst
+        self._increase = increase
+        self._decrease = decrease
+        self._cooldown = cooldown
+        self._lock = threading.Lock()
+        self._limits = {}
+        self._timer = time.monotonic
+        self._sleep = time.sleep
+
+    def _limit(self, key, now):
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = _Limit(self._rate, now)
+            # A new key starts with a full burst.
+            limit.next_time = now - self._burst
+        return limit
+
+    def acquire(self, key, count=1):
+        """Waits until requests may be sent, see RateGovernor.acquire."""
+        with self._lock:
+            limit = self._limit(key, self._timer())
+            limit.waiting += count
+        try:
+            while True:
+                with self._lock:
+                    now = self._timer()
+                    # Take the next place in the schedule.
+                    start = max(limit.next_time, now - self._burst)
+                    start = max(start, limit.blocked_until)
+                    limit.next_time = start + count / limit.rate
+                    limit.saturated = start > now
+                    epoch = limit.epoch
+                if start <= now:
+                    break
+                self._sleep(start - now)
+                with self._lock:
+                    if limit.epoch == epoch:
+                        break
+        finally:
+            with self._lock:
+                limit.waiting -= count
+        with self._lock:
+            limit.in_flight += count
+            limit.requests += count
+
+    def record(self, key, resp, throttled):
+        """Records the outcome of a request, see RateGovernor.record."""
+        with self._lock:
+            now = self._timer()
+            limit = self._limit(key, now)
+            limit.in_flight = max(0, limit.in_flight - 1)
+            if resp is None:
+                return
+            if throttled:
+                limit.throttled += 1
+                if (
+                    limit.last_decrease is None
+                    or now - limit.last_decrease >= self._cooldown
+                ):
+                    limit.rate = max(self._min_rate, limit.rate * self._decrease)
+                    limit.last_decrease = limit.last_change = now
+                    # Requests already waiting were scheduled at the old rate.
+                    limit.next_time = now
+                    limit.epoch += 1
+            elif resp.status < 500 and limit.saturated:
+                limit.rate += self._increase * (now - limit.last_change)
+                if self._max_rate is not None:
+                    limit.rate = min(limit.rate, self._max_rate)
+                limit.last_change = now
+            else:
+                limit.last_change = now
+            if throttled or resp.status == http_client.SERVICE_UNAVAILABLE:
+                delay = _retry_after(resp)
+                if delay is not None and now + delay > limit.blocked_until:
+                    limit.blocked_until = now + delay
+                    limit.epoch += 1
+
+    def stats(self):
+        """Returns metrics per key.
+
+        Returns:
+          A dict mapping each key seen so far to a dict of its current `rate`
+          in requests per second, the number of requests `waiting` to be sent
+          (the queue depth) and `in_flight`, the total number of `requests`
+          and of `throttled` responses, and `blocked_for`, the seconds left
+          before a Retry-After expires.
+        """
+        with self._lock:
+            now = self._timer()
+            return {
+                key: {
+                    "rate": limit.rate,
+                    "waiting": limit.waiting,
+                    "in_flight": limit.in_flight,
+                    "requests": limit.requests,
+                    "throttled": limit.throttled,
+                    "blocked_for": max(0.0, limit.blocked_until - now),
+                }
+                for key, limit in self._limits.items()
+            }
+
+
+_rate_governor = None
+
+
+def set_rate_governor(governor):
+    """Sets the rate governor of the process.
+
+    Args:
+      governor: RateGovernor, paces every request sent by HttpRequest.execute
+        and HttpRequest.next_chunk, media downloads and
+        BatchHttpRequest.execute from then on, or None to stop pacing.
+
+    Returns:
+      The previous rate governor, or None.
+    """
+    global _rate_governor
+    previous, _rate_governor = _rate_governor, governor
+    return previous
+
+
+def get_rate_governor():
+    """Returns the rate governor of the process, or None."""
+    return _rate_governor
+
+
+def _should_retry_exception(exception):
+    """Whether a request should be retried after a transport error.
+
+    Args:
+      exception: Exception, the error raised while sending the request.
+
+    Returns:
+      True for the errors _retry_request retries on.
+    """
+    if isinstance(
+        exception,
+        (_ssl_SSLError, socket.timeout, ConnectionError, httplib2.ServerNotFoundError),
+    ):
+        return True
+    if isinstance(exception, OSError):
+        return socket.errno.errorcode.get(exception.errno) in _RETRYABLE_SOCKET_ERRORS
+    return False
+
+
+def _is_thread_safe(http):
+    """Whether requests can be sent over http from several threads at once.
+
+    That is the case of a PooledHttp, possibly wrapped by an authorized http
+    object such as google_auth_httplib2.AuthorizedHttp.
+    """
+    return isinstance(http, PooledHttp) or isinstance(
+        getattr(http, "http", None), PooledHttp
+    )
+
+
+def _can_clone_http(http):
+    """Whether _clone_http can make a new transport configured like http."""
+    if _auth.google_auth_httplib2 is not None and isinstance(
+        http, _auth.google_auth_httplib2.AuthorizedHttp
+    ):
+        return _can_clone_http(http.http)
+    # An Http whose request method was replaced on the instance, such as the
+    # http objects authorized by oauth2client, would lose that replacement.
+    return type(http) is httplib2.Http and "request" not in vars(http)
+
+
+def _clone_http(http):
+    """Returns a new transport with the configuration of http.
+
+    The clone has its own connections, and its own lists of certificates and
+    credentials so that closing it leaves those of http untouched. An
+    AuthorizedHttp is cloned with the same credentials around a clone of the
+    http object it wraps.
+
+    Args:
+      http: httplib2.Http or google_auth_httplib2.AuthorizedHttp, for which
+        _can_clone_http is true.
+    """
+    if isinstance(http, httplib2.Http):
+        # Copies go through __getstate__, which leaves out the connections.
+        clone = copy.copy(http)
+        clone.certificates = copy.copy(http.certificates)
+        clone.credentials = copy.copy(http.credentials)
+        clone.authorizations = list(http.authorizations)
+        return clone
+    return type(http)(
+        http.credentials,
+        http=_clone_http(http.http),
+        refresh_status_codes=http._refresh_status_codes,
+        max_refresh_attempts=http._max_refresh_attempts,
+    )
+
+
+class _TransportPool(object):
+    """Hands out transports to the worker threads of a concurrent operation.
+
+    Workers send their requests over the given http object if it is
+    thread-safe, otherwise over transports returned by http_factory, which are
+    reused from request to request and closed when the pool is closed. Without
+    http_factory, the transports are clones of a plain httplib2.Http or
+    AuthorizedHttp, see _clone_http. Any other http object that is not
+    thread-safe only allows a single worker.
+    """
+
+    def __init__(self, http, http_factory=None):
+        self._http = http
+        if (
+            http_factory is None
+            and not _is_thread_safe(http)
+            and _can_clone_http(http)
+        ):
+            http_factory = functools.partial(_clone_http, http)
+        self._http_factory = http_factory
+        self._idle = queue.Queue()
+
+    def max_workers(self, max_workers):
+        """Caps a number of workers to the number the transports allow."""
+        if (
+            max_workers > 1
+            and self._http_factory is None
+            and not _is_thread_safe(self._http)
+        ):
+            LOGGER.warning(
+                "%s objects can not be shared by several threads, sending "
+                "requests one at a time instead of %d at once. Pass an "
+                "http_factory, or an http object from "
+                "build_http(max_connections_per_host=%d), to send them "
+                "concurrently.",
+                type(self._http).__name__,
+                max_workers,
+                max_workers,
+            )
+            return 1
+        return max_workers
+
+    def get(self):
+        if self._http_factory is None:
+            return self._http
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._http_factory()
+
+    def put(self, http):
+        if self._http_factory is not None:
+            self._idle.put(http)
+
+    def close(self):
+        """Closes the transports created with http_factory."""
+        while True:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            http.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class MediaUploadProgress(object):
     """Status of a resumable upload."""
 
@@ -375,6 +855,30 @@ class MediaUpload(object):
         """
         raise NotImplementedError()
 
+    def has_buffer(self):
+        """Does the upload support getbuffer().
+
+        Returns:
+          True if getbuffer() can return slices of the media without copying
+          them, in which case chunks are sent from those slices rather than
+          from stream().
+        """
+        return False
+
+    def getbuffer(self, begin, length):
+        """Get a buffer over bytes of the media.
+
+        Args:
+          begin: int, offset from beginning of file.
+          length: int, number of bytes, starting at begin, or -1 for all the
+            bytes up to the end of the media.
+
+        Returns:
+          A bytes-like object. May be shorter than length if EOF was reached
+          first.
+        """
+        return self.getbytes(begin, length)
+
     @util.positional(1)
     def _to_json(self, strip=None):
         """Utility function for creating a JSON representation of a MediaUpload.
@@ -569,11 +1073,21 @@ class MediaFileUpload(MediaIoBaseUpload):
     also avoids loading the entire file into memory before sending it. Note that
     Google App Engine has a 5MB limit on request size, so you should never set
     your chunksize larger than 5MB, or to -1.
+
+    With use_mmap=True, the file is memory-mapped and the chunks of a resumable
+    upload are sent straight from the mapping, instead of being read into a new
+    bytes object piece by piece, and the next chunk is read ahead while the
+    current one is sent. The file must not be truncated during the upload.
     """
 
     @util.positional(2)
     def __init__(
-        self, filename, mimetype=None, chunksize=DEFAULT_CHUNK_SIZE, resumable=False
+        self,
+        filename,
+        mimetype=None,
+        chunksize=DEFAULT_CHUNK_SIZE,
+        resumable=False,
+        use_mmap=False,
     ):
         """Constructor.
 
@@ -588,9 +1102,14 @@ class MediaFileUpload(MediaIoBaseUpload):
             or to -1.
           resumable: bool, True if this is a resumable upload. False means upload
             in a single request.
+          use_mmap: bool, True to send the chunks of a resumable upload from a
+            memory map of the file.
         """
         self._fd = None
+        self._mmap = None
+        self._released = 0
         self._filename = filename
+        self._use_mmap = use_mmap
         self._fd = open(self._filename, "rb")
         if mimetype is None:
             # No mimetype provided, make a guess.
@@ -601,11 +1120,59 @@ class MediaFileUpload(MediaIoBaseUpload):
         super(MediaFileUpload, self).__init__(
             self._fd, mimetype, chunksize=chunksize, resumable=resumable
         )
+        # An empty file can not be mapped.
+        if use_mmap and self._size:
+            self._mmap = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mmap, "madvise"):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
 
     def __del__(self):
+        if self._mmap:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A slice is still in use, the mapping goes with it.
+                pass
         if self._fd:
             self._fd.close()
 
+    def has_buffer(self):
+        """Does the upload support getbuffer().
+
+        Returns:
+          True if the file is memory-mapped.
+        """
+        return self._mmap is not None
+
+    def getbuffer(self, begin, length):
+        """Get a buffer over bytes of the media.
+
+        Args:
+          begin: int, offset from beginning of file.
+          length: int, number of bytes, starting at begin, or -1 for all the
+            bytes up to the end of the file.
+
+        Returns:
+          A memoryview of the memory-mapped file. May be shorter than length
+          if EOF was reached first.
+        """
+        if self._mmap is None:
+            return self.getbytes(begin, length)
+        end = self._size if length < 0 else min(begin + length, self._size)
+        if hasattr(self._mmap, "madvise") and begin < self._size:
+            start = begin - begin % mmap.PAGESIZE
+            if start > self._released:
+                # Unmap the chunks already sent, they stay in the page cache.
+                self._mmap.madvise(
+                    mmap.MADV_DONTNEED, self._released, start - self._released
+                )
+                self._released = start
+            # Have the kernel read this chunk and the next one ahead, while the
+            # current chunk is being sent.
+            ahead = min(end + (end - begin), self._size)
+            self._mmap.madvise(mmap.MADV_WILLNEED, start, ahead - start)
+        return memoryview(self._mmap)[begin:end]
+
     def to_json(self):
         """Creating a JSON representation of an instance of MediaFileUpload.
 
@@ -613,7 +1180,7 @@ class MediaFileUpload(MediaIoBaseUpload):
            string, a JSON representation of this instance, suitable to pass to
            from_json().
         """
-        return self._to_json(strip=["_fd"])
+        return self._to_json(strip=["_fd", "_mmap", "_released"])
 
     @staticmethod
     def from_json(s):
@@ -623,6 +1190,7 @@ class MediaFileUpload(MediaIoBaseUpload):
             mimetype=d["_mimetype"],
             chunksize=d["_chunksize"],
             resumable=d["_resumable"],
+            use_mmap=d.get("_use_mmap", False),
         )
 
 
@@ -747,6 +1315,7 @@ class MediaIoBaseDownload(object):
             self._uri,
             "GET",
             headers=headers,
+            governor_key=self._request.methodId,
         )
 
         if resp.status in [200, 206]:
@@ -780,6 +1349,267 @@ class MediaIoBaseDownload(object):
         raise HttpError(resp, content, uri=self._uri)
 
 
+class MediaParallelDownload(object):
+    """Download media resources over several concurrent ranged requests.
+
+    The first request learns the size of the media from its content-range,
+    then the remaining chunks are fetched by up to max_workers concurrent
+    requests and written in place, so at most max_workers chunks are held in
+    memory at a time. httplib2.Http objects are not thread-safe, so unless the
+    http object of the request is a PooledHttp, chunks are fetched over
+    transports returned by http_factory, or by default over clones of that
+    http object, see BatchExecutor.
+
+    fd must accept positional writes: either a file object with a file
+    descriptor, which is extended to the size of the media, or a writable
+    buffer such as an mmap or a bytearray, which must already be large enough.
+
+    The completed chunks are recorded in a bitmap. If a download fails, it can
+    be resumed by a new downloader given the bitmap of the failed one and the
+    same fd and chunksize.
+
+    Example:
+      request = farms.animals().get_media(id='cow')
+      fh = io.FileIO('cow.png', mode='wb')
+      downloader = MediaParallelDownload(fh, request, max_workers=8)
+      try:
+        downloader.download(num_retries=3)
+      except HttpError:
+        save_for_later(downloader.bitmap)
+    """
+
+    @util.positional(3)
+    def __init__(
+        self,
+        fd,
+        request,
+        chunksize=DEFAULT_PARALLEL_CHUNK_SIZE,
+        max_workers=4,
+        http_factory=None,
+        resume_bitmap=None,
+    ):
+        """Constructor.
+
+        Args:
+          fd: file object with a file descriptor, or writable buffer, where the
+            downloaded bytes are written.
+          request: googleapiclient.http.HttpRequest, the media request to perform
+            in chunks.
+          chunksize: int, File will be downloaded in chunks of this many bytes.
+          max_workers: int, maximum number of chunks downloaded at the same time.
+          http_factory: callable, returns a new httplib2.Http object to download
+            chunks with, for each chunk in flight. Defaults to cloning the http
+            object of the request when it is not thread-safe.
+          resume_bitmap: bytes, the bitmap of a previous download of the same
+            media to resume.
+
+        Raises:
+          ValueError if max_workers is out of range, or fd does not accept
+          positional writes.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive, got %r" % max_workers)
+        self._fd = fd
+        self._request = request
+        self._uri = request.uri
+        self._chunksize = chunksize
+        self._max_workers = max_workers
+        self._http_factory = http_factory
+        self._bitmap = None if resume_bitmap is None else bytearray(resume_bitmap)
+        self._progress = 0
+        self._total_size = None
+        self._lock = threading.Lock()
+
+        self._sleep = time.sleep
+        self._rand = random.random
+
+        try:
+            self._fileno = fd.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            self._fileno = None
+            try:
+                self._buffer = memoryview(fd).cast("B")
+            except TypeError:
+                raise ValueError(
+                    "fd must be a file with a file descriptor or a writable buffer"
+                )
+            if self._buffer.readonly:
+                raise ValueError("fd must be a writable buffer")
+        else:
+            if hasattr(fd, "flush"):
+                fd.flush()
+
+        self._headers = {}
+        for k, v in request.headers.items():
+            # see MediaIoBaseDownload
+            if not k.lower() in ("accept", "accept-encoding", "user-agent"):
+                self._headers[k] = v
+
+    @property
+    def bitmap(self):
+        """bytes, one bit per chunk, set for the chunks downloaded, or None if
+        the size of the media is not known yet."""
+        with self._lock:
+            return None if self._bitmap is None else bytes(self._bitmap)
+
+    @util.positional(1)
+    def download(self, num_retries=0):
+        """Download the media.
+
+        Args:
+          num_retries: Integer, number of times each chunk request is retried
+            with randomized exponential backoff.
+
+        Returns:
+          MediaDownloadProgress, the status of the completed download.
+
+        Raises:
+          googleapiclient.errors.HttpError if a response was not a 2xx.
+          httplib2.HttpLib2Error if a transport error has occurred.
+          ValueError if resume_bitmap does not match the media.
+        """
+        if self._bitmap is None:
+            first = 0
+        else:
+            pending = self._pending_chunks()
+            first = pending[0] if pending else len(self._bitmap) * 8
+        resp, content = self._get_range(first, num_retries)
+        if resp.status == 416:
+            # Range Not Satisfiable: an empty file, or all chunks are done
+            self._start(self._media_size(resp, content))
+            if self._pending_chunks():
+                raise HttpError(resp, content, uri=self._uri)
+            return MediaDownloadProgress(self._progress, self._total_size)
+        if resp.status == 200:
+            # the server sent the whole media
+            self._chunksize = max(len(content), 1)
+            self._bitmap = None
+            self._start(len(content))
+            if content:
+                self._store(0, content)
+            return MediaDownloadProgress(self._progress, self._total_size)
+        if resp.status != 206:
+            raise HttpError(resp, content, uri=self._uri)
+        self._start(self._media_size(resp, content))
+        if len(content) != self._chunk_length(first):
+            raise HttpError(resp, content, uri=self._uri)
+        self._store(first, content)
+
+        pending = self._pending_chunks()
+        if pending:
+            with _TransportPool(self._request.http, self._http_factory) as transports:
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=min(
+                        transports.max_workers(self._max_workers), len(pending)
+                    )
+                ) as executor:
+                    futures = [
+                        executor.submit(self._fetch, transports, index, num_retries)
+                        for index in pending
+                    ]
+                    try:
+                        for future in concurrent.futures.as_completed(futures):
+                            future.result()
+                    except BaseException:
+                        for future in futures:
+                            future.cancel()
+                        raise
+        return MediaDownloadProgress(self._progress, self._total_size)
+
+    def _media_size(self, resp, content):
+        """Returns the size of the media, from the content-range of resp."""
+        try:
+            return int(resp.get("content-range", "").rsplit("/", 1)[1])
+        except (IndexError, ValueError):
+            raise HttpError(resp, content, uri=self._uri)
+
+    def _start(self, total_size):
+        """Sizes the bitmap and fd for the media."""
+        chunks = -(-total_size // self._chunksize)
+        if self._bitmap is None:
+            self._bitmap = bytearray(-(-chunks // 8))
+        elif len(self._bitmap) != -(-chunks // 8):
+            raise ValueError("resume_bitmap does not match the size of the media")
+        self._total_size = total_size
+        self._progress = sum(
+            self._chunk_length(index)
+            for index in range(chunks)
+            if self._bitmap[index >> 3] & (1 << (index & 7))
+        )
+        if self._fileno is not None:
+            if os.fstat(self._fileno).st_size != total_size:
+                os.ftruncate(self._fileno, total_size)
+        elif len(self._buffer) < total_size:
+            raise ValueError(
+                "fd is too small for the media, %d bytes needed" % total_size
+            )
+
+    def _pending_chunks(self):
+        if self._total_size is None:
+            chunks = len(self._bitmap) * 8
+        else:
+            chunks = -(-self._total_size // self._chunksize)
+        return [
+            index
+            for index in range(chunks)
+            if not self._bitmap[index >> 3] & (1 << (index & 7))
+        ]
+
+    def _chunk_length(self, index):
+        start = index * self._chunksize
+        return min(self._chunksize, self._total_size - start)
+
+    def _get_range(self, index, num_retries, http=None):
+        headers = self._headers.copy()
+        start = index * self._chunksize
+        headers["range"] = "bytes=%d-%d" % (start, start + self._chunksize - 1)
+        return _retry_request(
+            http or self._request.http,
+            num_retries,
+            "media download",
+            self._sleep,
+            self._rand,
+            self._uri,
+            "GET",
+            headers=headers,
+            governor_key=self._request.methodId,
+        )
+
+    def _fetch(self, transports, index, num_retries):
+        """Downloads and stores one chunk.
+
+        Runs in a worker thread.
+        """
+        http = transports.get()
+        try:
+            resp, content = self._get_range(index, num_retries, http)
+        finally:
+            transports.put(http)
+        if resp.status != 206 or len(content) != self._chunk_length(index):
+            raise HttpError(resp, content, uri=self._uri)
+        self._store(index, content)
+
+    def _store(self, index, content):
+        offset = index * self._chunksize
+        if self._fileno is None:
+            self._buffer[offset : offset + len(content)] = content
+        elif hasattr(os, "pwrite"):
+            view = memoryview(content)
+            while view:
+                written = os.pwrite(self._fileno, view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            with self._lock:
+                os.lseek(self._fileno, offset, os.SEEK_SET)
+                view = memoryview(content)
+                while view:
+                    view = view[os.write(self._fileno, view) :]
+        with self._lock:
+            self._bitmap[index >> 3] |= 1 << (index & 7)
+            self._progress += len(content)
+
+
 class _StreamSlice(object):
     """Truncated stream.
 
@@ -874,7 +1704,7 @@ class HttpRequest(object):
         self._sleep = time.sleep
 
     @util.positional(1)
-    def execute(self, http=None, num_retries=0):
+    def execute(self, http=None, num_retries=0, stream=False):
         """Execute the request.
 
         Args:
@@ -884,10 +1714,16 @@ class HttpRequest(object):
                 exponential backoff. If all retries fail, the raised HttpError
                 represents the last request. If zero (default), we attempt the
                 request only once.
+          stream: Boolean, whether to return the response body as a file-like
+                object which is read off the connection as it is consumed,
+                instead of the deserialized response. The caller must close
+                it. Only Http objects supporting httplib2's stream argument
+                avoid holding the whole body in memory.
 
         Returns:
           A deserialized object model of the response body as determined
-          by the postproc.
+          by the postproc, or with stream, a file-like object of the raw
+          (decompressed) response body.
 
         Raises:
           googleapiclient.errors.HttpError if the response was not a 2xx.
@@ -896,6 +1732,9 @@ class HttpRequest(object):
         if http is None:
             http = self.http
 
+        if stream and self.resumable:
+            raise ValueError("Resumable uploads can not be streamed.")
+
         if self.resumable:
             body = None
             while body is None:
@@ -920,6 +1759,7 @@ class HttpRequest(object):
             self.headers["content-length"] = str(len(self.body))
 
         # Handle retries for server-side errors.
+        kwargs = {"stream": True} if stream else {}
         resp, content = _retry_request(
             http,
             num_retries,
@@ -930,12 +1770,18 @@ class HttpRequest(object):
             method=str(self.method),
             body=self.body,
             headers=self.headers,
+            governor_key=self.methodId,
+            **kwargs
         )
 
         for callback in self.response_callbacks:
             callback(resp)
         if resp.status >= 300:
             raise HttpError(resp, content, uri=self.uri)
+        if stream:
+            if isinstance(content, bytes):
+                content = io.BytesIO(content)
+            return content
         return self.postproc(resp, content)
 
     @util.positional(2)
@@ -1014,6 +1860,7 @@ class HttpRequest(object):
                 method=self.method,
                 body=self.body,
                 headers=start_headers,
+                governor_key=self.methodId,
             )
 
             if resp.status == 200 and "location" in resp:
@@ -1025,13 +1872,21 @@ class HttpRequest(object):
             # the upload by sending an empty PUT and reading the 'range' header in
             # the response.
             headers = {"Content-Range": "bytes */%s" % size, "content-length": "0"}
-            resp, content = http.request(self.resumable_uri, "PUT", headers=headers)
+            resp, content = _governed_request(
+                self.methodId, http, self.resumable_uri, "PUT", headers=headers
+            )
             status, body = self._process_response(resp, content)
             if body:
                 # The upload was complete.
                 return (status, body)
 
-        if self.resumable.has_stream():
+        if self.resumable.has_buffer():
+            # Sent as is, without copying the chunk.
+            data = self.resumable.getbuffer(
+                self.resumable_progress, self.resumable.chunksize()
+            )
+            chunk_end = self.resumable_progress + len(data) - 1
+        elif self.resumable.has_stream():
             data = self.resumable.stream()
             if self.resumable.chunksize() == -1:
                 data.seek(self.resumable_progress)
@@ -1081,8 +1936,13 @@ class HttpRequest(object):
                 )
 
             try:
-                resp, content = http.request(
-                    self.resumable_uri, method="PUT", body=data, headers=headers
+                resp, content = _governed_request(
+                    self.methodId,
+                    http,
+                    self.resumable_uri,
+                    method="PUT",
+                    body=data,
+                    headers=headers,
                 )
             except:
                 self._in_error_state = True
@@ -1162,6 +2022,207 @@ class HttpRequest(object):
         return resp, contents
 
 
+# The batch body is written and read without the email package where possible.
+# The helpers below reproduce the output of email.generator.Generator (with the
+# compat32 policy used by BatchHttpRequest) and the parts of FeedParser the
+# batch protocol relies on; anything outside of that falls back to the email
+# package.
+_BATCH_PART_HEADERS = (
+    "Content-Type: application/http\n"
+    "MIME-Version: 1.0\n"
+    "Content-Transfer-Encoding: binary\n"
+)
+_MAX_HEADER_LEN = 78
+_BOUNDARY_FMT = "%%0%dd" % len(repr(sys.maxsize - 1))
+_LINE_BREAK = re.compile("\r\n|\r|\n")
+_FROM_LINE = re.compile("^From ", re.MULTILINE)
+_HEADER_LINE = re.compile(rb"[\041-\071\073-\176]+:")
+_HEADERS_END = re.compile(rb"\n\r?\n")
+
+
+def _is_plain_header(name, value):
+    """Whether a header is written verbatim by the email package."""
+    return (
+        isinstance(name, str)
+        and isinstance(value, str)
+        and value.isascii()
+        and "\r" not in value
+        and "\n" not in value
+    )
+
+
+def _make_boundary(text):
+    """Returns a multipart boundary that does not occur in text.
+
+    Uses the same format, and the same random number generator, as
+    email.generator.Generator.
+    """
+    boundary = ("=" * 15) + (_BOUNDARY_FMT % random.randrange(sys.maxsize)) + "=="
+    candidate = boundary
+    counter = 0
+    while ("--" + candidate) in text and re.search(
+        "^--" + re.escape(candidate) + "(--)?$", text, re.MULTILINE
+    ):
+        candidate = boundary + "." + str(counter)
+        counter += 1
+    return candidate
+
+
+def _write_http_message(major, minor, headers, host, body):
+    """Writes the headers and body of a batched request.
+
+    Args:
+      major: string, major type of the body.
+      minor: string, minor type of the body.
+      headers: dict, headers of the request, without the content type.
+      host: string, value of the Host header.
+      body: string, the body of the request, or None.
+
+    Returns:
+      The message as MIMENonMultipart and Generator(maxheaderlen=0) would
+      write it, or None if the message needs the email package.
+    """
+    if not _is_plain_header(major, minor) or not _is_plain_header("Host", host):
+        return None
+    lines = ["Content-Type: %s/%s\n" % (major, minor), "MIME-Version: 1.0\n"]
+    for key, value in headers.items():
+        if not _is_plain_header(key, value):
+            return None
+        lines.append("%s: %s\n" % (key, value))
+    lines.append("Host: %s\n" % host)
+    if body is not None:
+        if not isinstance(body, str):
+            return None
+        if not body.isascii():
+            try:
+                body.encode("utf-8")
+            except UnicodeEncodeError:
+                # Surrogates get a charset dependent treatment.
+                return None
+        lines.append("content-length: %d\n" % len(body))
+    lines.append("\n")
+    if body:
+        lines.append(_LINE_BREAK.sub("\n", _FROM_LINE.sub(">From ", body)))
+    return "".join(lines)
+
+
+def _split_multipart(content_type, content):
+    """Splits a multipart body into its parts.
+
+    Args:
+      content_type: string, the Content-Type of the body.
+      content: bytes, the body.
+
+    Returns:
+      A list of (headers, payload) pairs, where headers is a list of
+      (name, value) string pairs and payload the bytes of the part, or None if
+      the body must be parsed by the email package.
+    """
+    if (
+        not isinstance(content, bytes)
+        or not isinstance(content_type, str)
+        or "\r" in content_type
+        or "\n" in content_type
+        # A bare CR is a line break for FeedParser.
+        or content.count(b"\r") != content.count(b"\r\n")
+    ):
+        return None
+    msg = Message()
+    msg["content-type"] = content_type
+    if msg.get_content_maintype() != "multipart" or msg.get_content_subtype() == (
+        "digest"
+    ):
+        return None
+    boundary = msg.get_boundary()
+    if not boundary:
+        return None
+    delimiter = re.compile(
+        b"^--" + re.escape(boundary.encode("utf-8")) + rb"(--)?[ \t]*\r?$",
+        re.MULTILINE,
+    )
+
+    parts = []
+    start = None
+    for match in delimiter.finditer(content):
+        if start is not None:
+            end = match.start()
+            if end <= start:
+                # Consecutive delimiters.
+                return None
+            # The line break before a delimiter belongs to the delimiter.
+            end -= 2 if content[end - 2 : end] == b"\r\n" else 1
+            part = _split_part(content[start:end])
+            if part is None:
+                return None
+            parts.append(part)
+        if match.group(1):
+            return parts if parts else None
+        start = match.end() + 1
+    # No close delimiter.
+    return None
+
+
+def _split_part(part):
+    """Splits a body part into its headers and payload, see _split_multipart."""
+    if part.startswith((b"\n", b"\r\n")):
+        return [], part[part.index(b"\n") + 1 :]
+    match = _HEADERS_END.search(part)
+    if match is None:
+        return None
+    headers = []
+    for line in part[: match.start()].split(b"\n"):
+        if not _HEADER_LINE.match(line):
+            # Folded header or malformed line.
+            return None
+        name, value = line.decode("utf-8").split(":", 1)
+        headers.append((name, value.lstrip(" \t").rstrip("\r\n")))
+        if name.lower() == "content-type":
+            ctype = value.split(";", 1)[0].strip().lower()
+            if ctype.count("/") == 1 and ctype.split("/")[0] in (
+                "multipart",
+                "message",
+            ):
+                return None
+    return headers, part[match.end() :]
+
+
+def _parse_http_response(payload):
+    """Parses a batched response without the email package.
+
+    Args:
+      payload: bytes, status line, headers and body of the response.
+
+    Returns:
+      A pair (resp, content) as BatchHttpRequest._deserialize_response returns
+      it, with content as bytes, or None if the response must be parsed by the
+      email package.
+    """
+    status_line, sep, rest = payload.partition(b"\n")
+    end = rest.find(b"\r\n\r\n")
+    if not sep or end <= 0:
+        return None
+    header_block = rest[:end]
+    if header_block.count(b"\n") != header_block.count(b"\r\n"):
+        return None
+    status_line = status_line.decode("utf-8").split(" ", 2)
+    if len(status_line) != 3:
+        return None
+    protocol, status, reason = status_line
+
+    info = {}
+    for line in header_block.split(b"\r\n"):
+        if not _HEADER_LINE.match(line):
+            return None
+        name, value = line.decode("utf-8").split(":", 1)
+        info[name.lower()] = value.lstrip(" \t")
+    info["status"] = status
+
+    resp = httplib2.Response(info)
+    resp.reason = reason
+    resp.version = int(protocol.split("/", 1)[1].replace(".", ""))
+    return resp, rest[end + 4 :]
+
+
 class BatchHttpRequest(object):
     """Batches multiple HttpRequest objects into a single HTTP request.
 
@@ -1336,7 +2397,6 @@ class BatchHttpRequest(object):
         major, minor = request.headers.get("content-type", "application/json").split(
             "/"
         )
-        msg = MIMENonMultipart(major, minor)
         headers = request.headers.copy()
 
         if request.http is not None:
@@ -1348,23 +2408,43 @@ class BatchHttpRequest(object):
         if "content-type" in headers:
             del headers["content-type"]
 
+        body = _write_http_message(major, minor, headers, parsed.netloc, request.body)
+        if body is None:
+            body = self._write_mime_message(
+                major, minor, headers, parsed.netloc, request.body
+            )
+
+        return status_line + body
+
+    def _write_mime_message(self, major, minor, headers, host, body):
+        """Writes the headers and body of a batched request with the email package.
+
+        Args:
+          major: string, major type of the body.
+          minor: string, minor type of the body.
+          headers: dict, headers of the request, without the content type.
+          host: string, value of the Host header.
+          body: string, the body of the request, or None.
+
+        Returns:
+          The message as a string.
+        """
+        msg = MIMENonMultipart(major, minor)
         for key, value in headers.items():
             msg[key] = value
-        msg["Host"] = parsed.netloc
+        msg["Host"] = host
         msg.set_unixfrom(None)
 
-        if request.body is not None:
-            msg.set_payload(request.body)
-            msg["content-length"] = str(len(request.body))
+        if body is not None:
+            msg.set_payload(body)
+            msg["content-length"] = str(len(body))
 
         # Serialize the mime message.
         fp = io.StringIO()
         # maxheaderlen=0 means don't line wrap headers.
         g = Generator(fp, maxheaderlen=0)
         g.flatten(msg, unixfrom=False)
-        body = fp.getvalue()
-
-        return status_line + body
+        return fp.getvalue()
 
     def _deserialize_response(self, payload):
         """Convert string into httplib2 response and content.
@@ -1465,34 +2545,68 @@ class BatchHttpRequest(object):
           httplib2.HttpLib2Error if a transport error has occurred.
           googleapiclient.errors.BatchError if the response is the wrong format.
         """
-        message = MIMEMultipart("mixed")
-        # Message should not write out it's own headers.
-        setattr(message, "_write_headers", lambda self: None)
-
-        # Add all the individual requests.
+        # Add all the individual requests. The parts are laid out exactly as
+        # MIMEMultipart and Generator(mangle_from_=False) would write them; we
+        # can't use `as_string`, because it plays games with `From ` lines.
+        parts = []
         for request_id in order:
             request = requests[request_id]
 
-            msg = MIMENonMultipart("application", "http")
-            msg["Content-Transfer-Encoding"] = "binary"
-            msg["Content-ID"] = self._id_to_header(request_id)
+            content_id = self._id_to_header(request_id)
+            if len("Content-ID: ") + len(content_id) <= _MAX_HEADER_LEN:
+                content_id = "Content-ID: %s\n" % content_id
+            else:
+                content_id = compat32.fold("Content-ID", content_id)
 
             body = self._serialize_request(request)
-            msg.set_payload(body)
-            message.attach(msg)
+            if "\r" in body:
+                body = _LINE_BREAK.sub("\n", body)
+            parts.append(_BATCH_PART_HEADERS + content_id + "\n" + body)
 
-        # encode the body: note that we can't use `as_string`, because
-        # it plays games with `From ` lines.
-        fp = io.StringIO()
-        g = Generator(fp, mangle_from_=False)
-        g.flatten(message, unixfrom=False)
-        body = fp.getvalue()
+        boundary = _make_boundary("\n".join(parts))
+        delimiter = "\n--%s\n" % boundary
+        body = "--%s\n%s\n--%s--\n" % (boundary, delimiter.join(parts), boundary)
 
         headers = {}
-        headers["content-type"] = (
-            "multipart/mixed; " 'boundary="%s"'
-        ) % message.get_boundary()
+        headers["content-type"] = ("multipart/mixed; " 'boundary="%s"') % boundary
+
+        governor = _rate_governor
+        if governor is None:
+            self._post(http, body, headers)
+            return
 
+        # Each request of the batch counts against the rate of its method.
+        keys = [requests[request_id].methodId for request_id in order]
+        for key, count in collections.Counter(keys).items():
+            governor.acquire(key, count)
+        for request_id in order:
+            self._responses.pop(request_id, None)
+        # Requests without a response of their own share that of the batch.
+        batch_response = (None, None)
+        try:
+            self._post(http, body, headers)
+        except HttpError as e:
+            batch_response = (e.resp, e.content)
+            raise
+        finally:
+            for request_id, key in zip(order, keys):
+                resp, content = self._responses.get(request_id, batch_response)
+                throttled = resp is not None and _is_rate_limited(resp.status, content)
+                governor.record(key, resp, throttled)
+
+    def _post(self, http, body, headers):
+        """Sends the batch request and stores the responses.
+
+        Args:
+          http: httplib2.Http, an http object to be used to make the request with.
+          body: string, the body of the batch request.
+          headers: dict, the headers of the batch request.
+
+        Raises:
+          httplib2.HttpLib2Error if a transport error has occurred.
+          googleapiclient.errors.HttpError if the batch request failed as a whole.
+          googleapiclient.errors.BatchError if the response is the wrong format.
+        """
         resp, content = http.request(
             self._batch_uri, method="POST", body=body, headers=headers
         )
@@ -1500,6 +2614,34 @@ class BatchHttpRequest(object):
         if resp.status >= 300:
             raise HttpError(resp, content, uri=self._batch_uri)
 
+        parts = _split_multipart(resp["content-type"], content)
+        if parts is None:
+            self._parse_mime_response(resp, content)
+            return
+
+        for part_headers, payload in parts:
+            content_id = None
+            for name, value in part_headers:
+                if name.lower() == "content-id":
+                    content_id = value
+                    break
+            request_id = self._header_to_id(content_id)
+            response = _parse_http_response(payload)
+            if response is None:
+                response, content = self._deserialize_response(payload.decode("utf-8"))
+                response = (response, content.encode("utf-8"))
+            self._responses[request_id] = response
+
+    def _parse_mime_response(self, resp, content):
+        """Parses a batch response with the email package.
+
+        Args:
+          resp: httplib2.Response, the response to the batch request.
+          content: bytes, the body of the response.
+
+        Raises:
+          googleapiclient.errors.BatchError if the response is the wrong format.
+        """
         # Prepend with a content-type header so FeedParser can handle it.
         header = "content-type: %s\r\n\r\n" % resp["content-type"]
         # PY3's FeedParser only accepts unicode. So we should decode content
@@ -1606,6 +2748,243 @@ class BatchHttpRequest(object):
                 self._callback(request_id, response, exception)
 
 
+class BatchExecutor(object):
+    """Executes any number of requests as concurrent batch requests.
+
+    Requests are split into batches of at most batch_size requests, and up to
+    max_workers batches are sent at the same time, over the http object of the
+    first request. httplib2.Http objects are not thread-safe, so unless that
+    http object is a PooledHttp (see build_http), concurrent batches are sent
+    over transports returned by http_factory, or by default over clones of a
+    plain httplib2.Http or google_auth_httplib2.AuthorizedHttp. These
+    transports are reused from batch to batch and closed when execute()
+    returns. Other http objects, such as mocks, send batches one at a time,
+    with a warning.
+
+    Sub-requests that fail with a retryable error (see _should_retry_response)
+    are sent again in new batches, along with the other failed sub-requests,
+    after an exponential backoff. Sub-requests that succeeded are not sent
+    again. A batch that fails as a whole with a retryable error is sent again
+    in full.
+
+    Callbacks are called from the thread that called execute(), as batches
+    complete, so they need not be thread-safe.
+
+    Example:
+      from googleapiclient.http import BatchExecutor
+
+      def on_video(request_id, response, exception):
+        ...
+
+      executor = service.new_batch_executor(
+          callback=on_video, max_workers=8, num_retries=3)
+      for video_id in video_ids:
+        executor.add(service.videos().list(part="statistics", id=video_id))
+      executor.execute()
+    """
+
+    @util.positional(1)
+    def __init__(
+        self,
+        callback=None,
+        batch_uri=None,
+        batch_size=MAX_BATCH_LIMIT,
+        max_workers=4,
+        num_retries=0,
+        http_factory=None,
+    ):
+        """Constructor for a BatchExecutor.
+
+        Args:
+          callback: callable, A callback to be called for each response, of the
+            form callback(id, response, exception), see BatchHttpRequest.
+          batch_uri: string, URI to send batch requests to.
+          batch_size: int, maximum number of requests in a single batch request,
+            at most MAX_BATCH_LIMIT.
+          max_workers: int, maximum number of batch requests in flight.
+          num_retries: int, number of times a failed request is retried with
+            randomized exponential backoff.
+          http_factory: callable, returns a new httplib2.Http object to send
+            batch requests with, for each batch in flight. Defaults to cloning
+            the http object of the first request when it is not thread-safe.
+
+        Raises:
+          ValueError if batch_size or max_workers is out of range.
+        """
+        if not 0 < batch_size <= MAX_BATCH_LIMIT:
+            raise ValueError(
+                "batch_size must be between 1 and %d, got %r"
+                % (MAX_BATCH_LIMIT, batch_size)
+            )
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive, got %r" % max_workers)
+        self._callback = callback
+        self._batch_uri = batch_uri
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._num_retries = num_retries
+        self._http_factory = http_factory
+
+        # A map from id to request.
+        self._requests = {}
+
+        # A map from id to callback.
+        self._callbacks = {}
+
+        # List of request ids, in the order in which they were added.
+        self._order = []
+
+        # The last auto generated id.
+        self._last_auto_id = 0
+
+        self._sleep = time.sleep
+        self._rand = random.random
+
+    def _new_id(self):
+        """Create a new id, see BatchHttpRequest._new_id."""
+        self._last_auto_id += 1
+        while str(self._last_auto_id) in self._requests:
+            self._last_auto_id += 1
+        return str(self._last_auto_id)
+
+    @util.positional(2)
+    def add(self, request, callback=None, request_id=None):
+        """Add a new request.
+
+        Args:
+          request: HttpRequest, Request to add to the batch.
+          callback: callable, A callback to be called for this response, of the
+            form callback(id, response, exception), see BatchHttpRequest.
+          request_id: string, A unique id for the request. The id will be passed
+            to the callback with the response.
+
+        Raises:
+          BatchError if a media request is added.
+          KeyError is the request_id is not unique.
+        """
+        if request_id is None:
+            request_id = self._new_id()
+        if request.resumable is not None:
+            raise BatchError("Media requests cannot be used in a batch request.")
+        if request_id in self._requests:
+            raise KeyError("A request with this ID already exists: %s" % request_id)
+        self._requests[request_id] = request
+        self._callbacks[request_id] = callback
+        self._order.append(request_id)
+
+    def _send(self, transports, request_ids):
+        """Sends one batch request.
+
+        Runs in a worker thread.
+
+        Args:
+          transports: _TransportPool, the pool to take a transport from.
+          request_ids: list, ids of the requests to send.
+
+        Returns:
+          A list of (request_id, response, exception) triples, as passed to the
+          callbacks of a BatchHttpRequest.
+        """
+        results = []
+        batch = BatchHttpRequest(
+            callback=lambda *result: results.append(result),
+            batch_uri=self._batch_uri,
+        )
+        for request_id in request_ids:
+            batch.add(self._requests[request_id], request_id=request_id)
+
+        http = transports.get()
+        try:
+            batch.execute(http=http)
+        finally:
+            transports.put(http)
+        return results
+
+    def _should_retry(self, exception):
+        if isinstance(exception, HttpError):
+            return _should_retry_response(exception.resp.status, exception.content)
+        return _should_retry_exception(exception)
+
+    def execute(self):
+        """Execute all the requests as concurrent batch requests.
+
+        Raises:
+          httplib2.HttpLib2Error if a transport error has occurred.
+          googleapiclient.errors.HttpError if a batch request failed as a whole.
+          googleapiclient.errors.BatchError if a response is the wrong format.
+        """
+        if not self._order:
+            return
+        http = self._requests[self._order[0]].http
+        with _TransportPool(http, self._http_factory) as transports:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=transports.max_workers(self._max_workers)
+            ) as pool:
+                self._execute(pool, transports)
+
+    def _execute(self, pool, transports):
+        """Sends the batches and their retries, see execute().
+
+        Args:
+          pool: concurrent.futures.Executor, the worker threads.
+          transports: _TransportPool, the transports of the workers.
+        """
+        pending = list(self._order)
+        position = {request_id: i for i, request_id in enumerate(self._order)}
+        for retry_num in range(self._num_retries + 1):
+            if not pending:
+                break
+            if retry_num > 0:
+                sleep_time = self._rand() * 2**retry_num
+                LOGGER.warning(
+                    "Sleeping %.2f seconds before retry %d of %d for %d "
+                    "batched requests",
+                    sleep_time,
+                    retry_num,
+                    self._num_retries,
+                    len(pending),
+                )
+                self._sleep(sleep_time)
+            last_try = retry_num == self._num_retries
+
+            futures = {}
+            for start in range(0, len(pending), self._batch_size):
+                request_ids = pending[start : start + self._batch_size]
+                futures[pool.submit(self._send, transports, request_ids)] = request_ids
+            pending = []
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        if last_try or not self._should_retry(e):
+                            raise
+                        pending.extend(futures[future])
+                        continue
+                    for request_id, response, exception in results:
+                        if (
+                            exception is not None
+                            and not last_try
+                            and self._should_retry(exception)
+                        ):
+                            pending.append(request_id)
+                        else:
+                            self._dispatch(request_id, response, exception)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            # Keep retries in the order the requests were added.
+            pending.sort(key=position.__getitem__)
+
+    def _dispatch(self, request_id, response, exception):
+        callback = self._callbacks[request_id]
+        if callback is not None:
+            callback(request_id, response, exception)
+        if self._callback is not None:
+            self._callback(request_id, response, exception)
+
+
 class HttpRequestMock(object):
     """Mock of HttpRequest.
 
@@ -1751,6 +3130,7 @@ class HttpMock(object):
         headers=None,
         redirections=1,
         connection_type=None,
+        stream=False,
     ):
         self.uri = uri
         self.method = method
@@ -1803,6 +3183,7 @@ class HttpMockSequence(object):
         headers=None,
         redirections=1,
         connection_type=None,
+        stream=False,
     ):
         # Remember the request so after the fact this mock can be examined
         self.request_sequence.append((uri, method, body, headers))
@@ -1930,9 +3311,245 @@ def tunnel_patch(http):
     return http
 
 
-def build_http():
+class _ConnectionPool(object):
+    """The connections of a PooledHttp.
+
+    Stands in for the dict, keyed by scheme and authority, that httplib2.Http
+    keeps its connections in. get() checks an idle connection out for the
+    calling thread, and assignment registers a connection httplib2 just
+    created. The connections a thread holds are checked back in by release().
+    """
+
+    def __init__(self, max_per_host, idle_timeout, max_lifetime):
+        self._max_per_host = max_per_host
+        self._idle_timeout = idle_timeout
+        self._max_lifetime = max_lifetime
+        self._lock = threading.Condition()
+        # A map from key to a list of idle (connection, created, last used)
+        # triples, most recently used last.
+        self._idle = {}
+        # A map from key to the number of connections checked out.
+        self._busy = {}
+        # Connections created before that time are not reused.
+        self._cleared = None
+        self._local = threading.local()
+
+    def _held(self):
+        """Returns the map from key to (connection, created) of this thread."""
+        try:
+            return self._local.held
+        except AttributeError:
+            self._local.held = {}
+            self._local.depth = 0
+            return self._local.held
+
+    def _expired(self, created, last_used, now):
+        if self._cleared is not None and created < self._cleared:
+            return True
+        if self._max_lifetime is not None and now - created >= self._max_lifetime:
+            return True
+        return last_used is not None and now - last_used >= self._idle_timeout
+
+    def _evict(self, now):
+        """Removes the expired idle connections, and returns them."""
+        expired = []
+        for idle in self._idle.values():
+            kept = []
+            for entry in idle:
+                if self._expired(entry[1], entry[2], now):
+                    expired.append(entry[0])
+                else:
+                    kept.append(entry)
+            idle[:] = kept
+        return expired
+
+    def acquire(self):
+        """Marks the start of a request on this thread."""
+        self._held()
+        self._local.depth += 1
+
+    def release(self, discard=False):
+        """Marks the end of a request on this thread.
+
+        The connections of the thread are checked in once its outermost
+        request is done.
+
+        Args:
+          discard: bool, close the connections instead of keeping them.
+        """
+        held = self._held()
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.held = {}
+        now = time.monotonic()
+        with self._lock:
+            to_close = self._evict(now)
+            for key, (conn, created) in held.items():
+                self._busy[key] -= 1
+                if conn is None:
+                    continue
+                idle = self._idle.setdefault(key, [])
+                if (
+                    discard
+                    or self._expired(created, None, now)
+                    or len(idle) + self._busy[key] >= self._max_per_host
+                ):
+                    to_close.append(conn)
+                else:
+                    idle.append((conn, created, now))
+            self._lock.notify_all()
+        for conn in to_close:
+            conn.close()
+
+    def get(self, key, default=None):
+        """Checks a connection out for this thread.
+
+        Blocks while the host already has the maximum number of connections
+        checked out, unless this thread holds connections itself, in which case
+        one more connection is allowed rather than risking a deadlock.
+
+        Returns:
+          The connection, or default if httplib2 should create a new one.
+        """
+        held = self._held()
+        if key in held:
+            conn = held[key][0]
+            return default if conn is None else conn
+        to_close = []
+        try:
+            with self._lock:
+                while True:
+                    now = time.monotonic()
+                    idle = self._idle.get(key)
+                    while idle:
+                        conn, created, last_used = idle.pop()
+                        if self._expired(created, last_used, now):
+                            to_close.append(conn)
+                            continue
+                        self._busy[key] = self._busy.get(key, 0) + 1
+                        held[key] = (conn, created)
+                        return conn
+                    if self._busy.get(key, 0) < self._max_per_host or held:
+                        # Reserve the slot of the connection httplib2 creates.
+                        self._busy[key] = self._busy.get(key, 0) + 1
+                        held[key] = (None, now)
+                        return default
+                    self._lock.wait()
+        finally:
+            for conn in to_close:
+                conn.close()
+
+    def __setitem__(self, key, conn):
+        held = self._held()
+        if key not in held:
+            with self._lock:
+                self._busy[key] = self._busy.get(key, 0) + 1
+        held[key] = (conn, time.monotonic())
+
+    def pop(self, key, default=None):
+        """Drops the connection this thread holds, httplib2 closes it."""
+        held = self._held()
+        conn = held.get(key, (None, None))[0]
+        if conn is None:
+            return default
+        held[key] = (None, time.monotonic())
+        return conn
+
+    def clear(self):
+        """Closes the idle connections.
+
+        Connections checked out at that time are closed when checked in.
+        """
+        with self._lock:
+            self._cleared = time.monotonic()
+            idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for conn, _, _ in entries:
+                conn.close()
+
+
+class PooledHttp(httplib2.Http):
+    """A thread-safe httplib2.Http, with a pool of connections per host.
+
+    httplib2.Http keeps a single connection per host, without any locking, so
+    an Http object can not be shared between threads. PooledHttp checks a
+    connection out of a pool for each request, so a single PooledHttp, and the
+    service objects built with it, can serve a pool of threads while reusing
+    keep-alive connections.
+
+    Only the connection handling is made thread-safe; a cache passed to
+    PooledHttp must be thread-safe itself.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_connections_per_host=10,
+        idle_timeout=60.0,
+        max_lifetime=None,
+        **kwargs
+    ):
+        """Constructor for a PooledHttp.
+
+        Args:
+          *args, **kwargs: arguments of the httplib2.Http constructor.
+          max_connections_per_host: int, maximum number of connections to a
+            single host. Requests wait for a connection to be checked in when
+            that many are in use.
+          idle_timeout: float, seconds after which an idle connection is
+            closed.
+          max_lifetime: float, seconds after which a connection is closed
+            instead of being reused, or None to reuse connections forever.
+        """
+        super(PooledHttp, self).__init__(*args, **kwargs)
+        if max_connections_per_host < 1:
+            raise ValueError(
+                "max_connections_per_host must be positive, got %r"
+                % max_connections_per_host
+            )
+        self.max_connections_per_host = max_connections_per_host
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.connections = self._new_pool()
+
+    def _new_pool(self):
+        return _ConnectionPool(
+            self.max_connections_per_host, self.idle_timeout, self.max_lifetime
+        )
+
+    def request(self, *args, **kwargs):
+        pool = self.connections
+        pool.acquire()
+        try:
+            result = super(PooledHttp, self).request(*args, **kwargs)
+        except BaseException:
+            # The connections may be left in the middle of a response.
+            pool.release(discard=True)
+            raise
+        pool.release()
+        return result
+
+    request.__doc__ = httplib2.Http.request.__doc__
+
+    def close(self):
+        """Close persistent connections, clear sensitive data."""
+        self.connections.clear()
+        self.certificates.clear()
+        self.clear_credentials()
+
+    def __setstate__(self, state):
+        super(PooledHttp, self).__setstate__(state)
+        self.connections = self._new_pool()
+
+
+def build_http(max_connections_per_host=None):
     """Builds httplib2.Http object
 
+    Args:
+      max_connections_per_host: int, if set, build a thread-safe PooledHttp
+        keeping up to that many connections per host.
+
     Returns:
     A httplib2.Http object, which is used to make http requests, and which has timeout set by default.
     To override default timeout call
@@ -1945,7 +3562,12 @@ def build_http():
         http_timeout = socket.getdefaulttimeout()
     else:
         http_timeout = DEFAULT_HTTP_TIMEOUT_SEC
-    http = httplib2.Http(timeout=http_timeout)
+    if max_connections_per_host is not None:
+        http = PooledHttp(
+            timeout=http_timeout, max_connections_per_host=max_connections_per_host
+        )
+    else:
+        http = httplib2.Http(timeout=http_timeout)
     # 308's are used by several Google APIs (Drive, YouTube)
     # for Resumable Uploads rather than Permanent Redirects.
     # This asks httplib2 to exclude 308s from the status codes
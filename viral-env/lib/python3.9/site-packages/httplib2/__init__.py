@@ -40,6 +40,8 @@ import re
 import socket
 import ssl
 import sys
+import tempfile
+import threading
 import time
 import urllib.parse
 import zlib
@@ -412,6 +414,91 @@ def _decompressContent(response, new_content):
     return content
 
 
+class StreamingBody(io.RawIOBase):
+    """The entity body of a response made with stream=True.
+
+    A read-only file-like object which reads the body off the connection as it
+    is consumed, decompressing a gzip or deflate content-encoding on the fly,
+    so that large responses never have to be held in memory.
+
+    The connection belongs to the body until it is closed, which the caller
+    must do, either explicitly or by using it as a context manager.
+    """
+
+    # Size of the compressed reads off the connection.
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, conn, http_response, response):
+        self._conn = conn
+        self._http_response = http_response
+        self._tail = b""
+        self._decompressor = None
+        self._encoding = response.get("content-encoding", None)
+        if self._encoding in ["gzip", "deflate"]:
+            if self._encoding == "gzip":
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                self._decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+            self._started = False
+            # The content-length is that of the compressed body.
+            response.pop("content-length", None)
+            response["-content-encoding"] = response["content-encoding"]
+            del response["content-encoding"]
+        self._response = response
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.closed:
+            raise ValueError("I/O operation on closed body")
+        if self._decompressor is None:
+            return self._http_response.readinto(b)
+        if not len(b):
+            return 0
+        while True:
+            data = self._tail or self._http_response.read(self.CHUNK_SIZE)
+            if not data:
+                if not self._decompressor.eof:
+                    self._fail()
+                return 0
+            try:
+                out = self._decompressor.decompress(data, len(b))
+            except zlib.error:
+                if self._started or self._encoding != "deflate":
+                    self._fail()
+                # Some servers send a raw deflate stream, without zlib header.
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                self._tail = data
+                self._started = True
+                continue
+            self._started = True
+            self._tail = self._decompressor.unconsumed_tail
+            if self._decompressor.eof:
+                self._tail = b""
+                if self._encoding == "gzip" and self._decompressor.unused_data:
+                    # The body is made of several gzip members.
+                    self._tail = self._decompressor.unused_data
+                    self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if out:
+                b[: len(out)] = out
+                return len(out)
+
+    def _fail(self):
+        raise FailedToDecompressContent(
+            _("Content purported to be compressed with %s but failed to decompress.") % self._encoding,
+            self._response,
+            b"",
+        )
+
+    def close(self):
+        """Closes the body and the connection it was read from."""
+        if not self.closed:
+            super(StreamingBody, self).close()
+            self._http_response.close()
+            self._conn.close()
+
+
 def _bind_write_headers(msg):
     def _write_headers(self):
         # Self refers to the Generator object.
@@ -816,6 +903,150 @@ class FileCache(object):
             os.remove(cacheFullPath)
 
 
+class SharedFileCache(object):
+    """Uses a local directory as a store for cached files, shared by any
+    number of threads and processes.
+
+    Entries are written to a temporary file and renamed into place, so readers
+    never see a partially written entry. Files are spread over 256
+    subdirectories.
+
+    If max_size (in bytes) is set, the least recently used entries are evicted
+    once the directory grows past it. Every process keeps an estimate of the
+    size of the directory, refreshed by a scan of the directory at least every
+    scan_interval seconds, so the bound is approximate when several processes
+    write to the cache. If max_age (in seconds) is set, entries written longer
+    ago than that are dropped.
+
+    The hits, misses and evictions attributes count the lookups and evictions
+    of this instance.
+    """
+
+    _TEMP_PREFIX = ".tmp"
+    # Leftovers of writers that died between creating and renaming a file.
+    _TEMP_MAX_AGE = 3600
+
+    def __init__(self, cache, safe=safename, max_size=None, max_age=None, scan_interval=60):
+        self.cache = cache
+        self.safe = safe
+        self.max_size = max_size
+        self.max_age = max_age
+        self.scan_interval = scan_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None
+        self._scanned = 0
+        if not os.path.exists(cache):
+            os.makedirs(self.cache, exist_ok=True)
+
+    def _path(self, key):
+        name = self.safe(key)
+        shard = _md5(name.encode("utf-8")).hexdigest()[:2]
+        return os.path.join(self.cache, shard, name)
+
+    def _count(self, attr, n=1):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + n)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                st = os.fstat(f.fileno())
+                now = time.time()
+                if self.max_age is not None and now - st.st_mtime > self.max_age:
+                    retval = None
+                else:
+                    retval = f.read()
+        except (IOError, OSError):
+            self._count("misses")
+            return None
+        if retval is None:
+            self._remove(path)
+            self._count("evictions")
+            self._count("misses")
+            return None
+        if self.max_size is not None:
+            # The access time tracks recency for the LRU eviction; the
+            # modification time is left as the time the entry was written.
+            try:
+                os.utime(path, (now, st.st_mtime))
+            except OSError:
+                pass
+        self._count("hits")
+        return retval
+
+    def set(self, key, value):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=self._TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        if self.max_size is not None:
+            with self._lock:
+                if self._size is not None:
+                    self._size += len(value)
+                scan = (
+                    self._size is None
+                    or self._size > self.max_size
+                    or time.time() - self._scanned > self.scan_interval
+                )
+            if scan:
+                self._evict()
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except (IOError, OSError):
+            pass
+
+    def _evict(self):
+        """Scans the directory, and evicts the least recently used entries
+        until the cache is back to 90% of max_size."""
+        now = time.time()
+        entries = []
+        size = 0
+        for shard in os.scandir(self.cache):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.startswith(self._TEMP_PREFIX):
+                    if now - st.st_mtime > self._TEMP_MAX_AGE:
+                        self._remove(entry.path)
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+                size += st.st_size
+        evicted = 0
+        if size > self.max_size:
+            entries.sort()
+            target = self.max_size * 0.9
+            for _, entry_size, path in entries:
+                if size <= target:
+                    break
+                self._remove(path)
+                size -= entry_size
+                evicted += 1
+        with self._lock:
+            self._size = size
+            self._scanned = now
+            self.evictions += evicted
+
+
 class Credentials(object):
     def __init__(self):
         self.credentials = []
@@ -1356,7 +1587,7 @@ class Http(object):
         self.credentials.clear()
         self.authorizations = []
 
-    def _conn_request(self, conn, request_uri, method, body, headers):
+    def _conn_request(self, conn, request_uri, method, body, headers, stream=False):
         i = 0
         seen_bad_status_line = False
         while i < RETRIES:
@@ -1421,17 +1652,21 @@ class Http(object):
                 content = b""
                 if method == "HEAD":
                     conn.close()
+                elif stream and 200 <= response.status < 300:
+                    content = StreamingBody(conn, response, Response(response))
+                    response = content._response
                 else:
                     content = response.read()
-                response = Response(response)
-                if method != "HEAD":
-                    content = _decompressContent(response, content)
+                if not isinstance(content, StreamingBody):
+                    response = Response(response)
+                    if method != "HEAD":
+                        content = _decompressContent(response, content)
 
             break
         return (response, content)
 
     def _request(
-        self, conn, host, absolute_uri, request_uri, method, body, headers, redirections, cachekey,
+        self, conn, host, absolute_uri, request_uri, method, body, headers, redirections, cachekey, stream=False,
     ):
         """Do the actual request using the connection object
         and also follow one level of redirects if necessary"""
@@ -1441,18 +1676,18 @@ class Http(object):
         if auth:
             auth.request(method, request_uri, headers, body)
 
-        (response, content) = self._conn_request(conn, request_uri, method, body, headers)
+        (response, content) = self._conn_request(conn, request_uri, method, body, headers, stream)
 
         if auth:
             if auth.response(response, body):
                 auth.request(method, request_uri, headers, body)
-                (response, content) = self._conn_request(conn, request_uri, method, body, headers)
+                (response, content) = self._conn_request(conn, request_uri, method, body, headers, stream)
                 response._stale_digest = 1
 
         if response.status == 401:
             for authorization in self._auth_from_challenge(host, request_uri, headers, response, content):
                 authorization.request(method, request_uri, headers, body)
-                (response, content) = self._conn_request(conn, request_uri, method, body, headers)
+                (response, content) = self._conn_request(conn, request_uri, method, body, headers, stream)
                 if response.status != 401:
                     self.authorizations.append(authorization)
                     authorization.response(response, body)
@@ -1494,7 +1729,12 @@ class Http(object):
                             redirect_method = "GET"
                             body = None
                         (response, content) = self.request(
-                            location, method=redirect_method, body=body, headers=headers, redirections=redirections - 1,
+                            location,
+                            method=redirect_method,
+                            body=body,
+                            headers=headers,
+                            redirections=redirections - 1,
+                            stream=stream,
                         )
                         response.previous = old_response
                 else:
@@ -1517,7 +1757,14 @@ class Http(object):
     # including all socket.* and httplib.* exceptions.
 
     def request(
-        self, uri, method="GET", body=None, headers=None, redirections=DEFAULT_MAX_REDIRECTS, connection_type=None,
+        self,
+        uri,
+        method="GET",
+        body=None,
+        headers=None,
+        redirections=DEFAULT_MAX_REDIRECTS,
+        connection_type=None,
+        stream=False,
     ):
         """ Performs a single HTTP request.
 The 'uri' is the URI of the HTTP resource and can begin
@@ -1538,6 +1785,10 @@ exception is 'redirections. The default is 5.
 The return value is a tuple of (response, content), the first
 being and instance of the 'Response' class, the second being
 a string that contains the response entity body.
+
+If 'stream' is true, the entity body of a 2xx response is not read, and
+the content is a StreamingBody instead, which must be closed once read.
+Such responses bypass the cache.
         """
         conn_key = ""
 
@@ -1642,9 +1893,12 @@ a string that contains the response entity body.
                         cached_value = None
                         break
 
+            if stream:
+                cachekey = None
             if (
                 self.cache
                 and cached_value
+                and not stream
                 and (method in self.safe_methods or info["status"] == "308")
                 and "range" not in headers
             ):
@@ -1722,8 +1976,11 @@ a string that contains the response entity body.
                     content = b""
                 else:
                     (response, content) = self._request(
-                        conn, authority, uri, request_uri, method, body, headers, redirections, cachekey,
+                        conn, authority, uri, request_uri, method, body, headers, redirections, cachekey, stream,
                     )
+            if isinstance(content, StreamingBody) and content._conn is conn:
+                # The connection is not reused until the body is read.
+                self.connections.pop(conn_key, None)
         except Exception as e:
             is_timeout = isinstance(e, socket.timeout)
             if is_timeout:
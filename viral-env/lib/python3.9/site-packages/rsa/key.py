@@ -51,18 +51,60 @@ T = typing.TypeVar("T", bound="AbstractKey")
 class AbstractKey:
     """Abstract superclass for private and public keys."""
 
-    __slots__ = ("n", "e", "blindfac", "blindfac_inverse", "mutex")
+    __slots__ = ("n", "e", "blindfacs", "_mutex")
 
     def __init__(self, n: int, e: int) -> None:
         self.n = n
         self.e = e
 
-        # These will be computed properly on the first call to blind().
-        self.blindfac = self.blindfac_inverse = -1
+        # Pool of (blinding factor, inverse) pairs, see _update_blinding_factor().
+        self.blindfacs = []  # type: typing.List[typing.Tuple[int, int]]
 
-        # Used to protect updates to the blinding factor in multi-threaded
-        # environments.
-        self.mutex = threading.Lock()
+        # Only kept for the deprecated mutex attribute.
+        self._mutex = threading.Lock()
+
+    @staticmethod
+    def _warn_deprecated(name: str) -> None:
+        warnings.warn(
+            "AbstractKey.%s is deprecated: the blinding factors are kept in a "
+            "pool, see AbstractKey.blindfacs" % name,
+            DeprecationWarning,
+            stacklevel=3,
+        )
+
+    @property
+    def blindfac(self) -> int:
+        """The blinding factor to be used next, or -1 if there is none yet.
+
+        Deprecated, the key keeps a pool of blinding factors in blindfacs.
+        """
+        self._warn_deprecated("blindfac")
+        try:
+            return self.blindfacs[-1][0]
+        except IndexError:
+            return -1
+
+    @property
+    def blindfac_inverse(self) -> int:
+        """The inverse of blindfac, or -1 if there is none yet.
+
+        Deprecated, the key keeps a pool of blinding factors in blindfacs.
+        """
+        self._warn_deprecated("blindfac_inverse")
+        try:
+            return self.blindfacs[-1][1]
+        except IndexError:
+            return -1
+
+    @property
+    def mutex(self) -> threading.Lock:
+        """A lock of the key.
+
+        Deprecated, it no longer protects the blinding factors, which are
+        updated without a lock.
+        """
+        self._warn_deprecated("mutex")
+        return self._mutex
 
     @classmethod
     def _load_pkcs1_pem(cls: typing.Type[T], keyfile: bytes) -> T:
@@ -199,20 +241,26 @@ class AbstractKey:
         by Werner Schindler.
         See https://tls.mbed.org/public/WSchindler-RSA_Timing_Attack.pdf
 
+        Instead of a single blinding factor behind a lock, the key keeps a pool
+        of them: each call takes a factor out of the pool and puts its square
+        back, so concurrent threads never share a factor nor wait for each
+        other. The pool grows to the number of threads using the key at the
+        same time. list.pop() and list.append() are atomic, no lock is needed.
+
         :return: the new blinding factor and its inverse.
         """
 
-        with self.mutex:
-            if self.blindfac < 0:
-                # Compute initial blinding factor, which is rather slow to do.
-                self.blindfac = self._initial_blinding_factor()
-                self.blindfac_inverse = rsa.common.inverse(self.blindfac, self.n)
-            else:
-                # Reuse previous blinding factor.
-                self.blindfac = pow(self.blindfac, 2, self.n)
-                self.blindfac_inverse = pow(self.blindfac_inverse, 2, self.n)
+        try:
+            blindfac, blindfac_inverse = self.blindfacs.pop()
+        except IndexError:
+            # Compute initial blinding factor, which is rather slow to do.
+            blindfac = self._initial_blinding_factor()
+            blindfac_inverse = rsa.common.inverse(blindfac, self.n)
+
+        # Reuse the blinding factor next time.
+        self.blindfacs.append((pow(blindfac, 2, self.n), pow(blindfac_inverse, 2, self.n)))
 
-            return self.blindfac, self.blindfac_inverse
+        return blindfac, blindfac_inverse
 
 
 class PublicKey(AbstractKey):
@@ -474,16 +522,7 @@ class PrivateKey(AbstractKey):
 
         # Blinding and un-blinding should be using the same factor
         blinded, blindfac_inverse = self.blind(encrypted)
-
-        # Instead of using the core functionality, use the Chinese Remainder
-        # Theorem and be 2-4x faster. This the same as:
-        #
-        # decrypted = rsa.core.decrypt_int(blinded, self.d, self.n)
-        s1 = pow(blinded, self.exp1, self.p)
-        s2 = pow(blinded, self.exp2, self.q)
-        h = ((s1 - s2) * self.coef) % self.p
-        decrypted = s2 + self.q * h
-
+        decrypted = self._crt_pow(blinded)
         return self.unblind(decrypted, blindfac_inverse)
 
     def blinded_encrypt(self, message: int) -> int:
@@ -497,9 +536,30 @@ class PrivateKey(AbstractKey):
         """
 
         blinded, blindfac_inverse = self.blind(message)
-        encrypted = rsa.core.encrypt_int(blinded, self.d, self.n)
+        encrypted = self._crt_pow(blinded)
+
+        # A fault during the CRT computation would leak the factors of n
+        # through the signature, see 'On the Importance of Checking
+        # Cryptographic Protocols for Faults' by Boneh, DeMillo and Lipton.
+        # Checking the result with the public exponent is cheap.
+        if pow(encrypted, self.e, self.n) != blinded:
+            encrypted = rsa.core.encrypt_int(blinded, self.d, self.n)
+
         return self.unblind(encrypted, blindfac_inverse)
 
+    def _crt_pow(self, value: int) -> int:
+        """Raises value to the private exponent, modulo n.
+
+        Instead of using the core functionality, use the Chinese Remainder
+        Theorem and be 2-4x faster. This the same as:
+
+        rsa.core.decrypt_int(value, self.d, self.n)
+        """
+        s1 = pow(value, self.exp1, self.p)
+        s2 = pow(value, self.exp2, self.q)
+        h = ((s1 - s2) * self.coef) % self.p
+        return s2 + self.q * h
+
     @classmethod
     def _load_pkcs1_der(cls, keyfile: bytes) -> "PrivateKey":
         """Loads a key in PKCS#1 DER format.